@@ -3,6 +3,7 @@ import sys
 
 from PyQt6.QtWidgets import QApplication
 
+from core.autotune import apply_thread_settings
 from core.main_window import MainWindow
 from core.settings import AppSettings
 
@@ -11,6 +12,7 @@ class MusicSeparationApp:
     def __init__(self):
         self.qapp = QApplication(sys.argv)
         self.settings = AppSettings()
+        apply_thread_settings(self.settings)
         self.main_window = MainWindow(self.settings)
         self._apply_theme()
 
@@ -20,4 +22,6 @@ class MusicSeparationApp:
 
     def run(self) -> int:
         self.main_window.show()
+        if not self.settings.is_calibrated():
+            self.main_window.start_calibration()
         return self.qapp.exec()
@@ -0,0 +1,128 @@
+# core/autotune.py
+import os
+import tempfile
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+import soundfile as sf
+import torch
+from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot
+
+from core.settings import AppSettings
+from modules.audio.loader import open_source
+from modules.audio.store import SampleStore
+from modules.audio.visualization import TrackDecoder
+from modules.model_manager import MODEL_CONTEXT_SECONDS, separate_segment
+
+BENCHMARK_SECONDS = 20
+BENCHMARK_RATE = 44100
+BLOCK_SIZE_CANDIDATES = [16384, 65536, 262144]
+CHUNK_SECONDS_CANDIDATES = [5.0, 10.0, 30.0]
+
+
+def apply_thread_settings(settings: AppSettings) -> None:
+    """Apply the tuned torch thread count; 0 keeps torch's own default."""
+    threads = settings.get_performance("torch_threads")
+    if threads > 0:
+        torch.set_num_threads(threads)
+
+
+def _thread_candidates() -> List[int]:
+    cores = os.cpu_count() or 1
+    return sorted({1, 2, max(1, cores // 2), cores} & set(range(1, cores + 1)))
+
+
+def _fastest(candidates: Iterable[Any], run: Callable[[Any], None]) -> Any:
+    """Return the candidate with the lowest best-of-two wall time."""
+    timings = {}
+    for candidate in candidates:
+        best = float("inf")
+        for _ in range(2):
+            started = time.perf_counter()
+            run(candidate)
+            best = min(best, time.perf_counter() - started)
+        timings[candidate] = best
+    return min(timings, key=timings.get)
+
+
+class AutoTuner(QObject):
+    """
+    Micro-benchmarks decoding, peak building and model inference on this
+    machine and stores the fastest settings in AppSettings.
+
+    Meant to run on a worker thread, either on first launch or on demand.
+    """
+
+    progress_updated = pyqtSignal(int)
+    calibration_finished = pyqtSignal(object)
+    error_occurred = pyqtSignal(str)
+
+    def __init__(self, settings: AppSettings, model_factory: Optional[Callable] = None):
+        super().__init__()
+        self.settings = settings
+        self.model_factory = model_factory
+
+    @pyqtSlot()
+    def run(self) -> None:
+        try:
+            results = {}
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, "calibration.wav")
+                rng = np.random.default_rng(0)
+                signal = rng.uniform(-0.5, 0.5, (BENCHMARK_SECONDS * BENCHMARK_RATE, 2))
+                sf.write(path, signal.astype(np.float32), BENCHMARK_RATE, "PCM_16")
+                self.progress_updated.emit(10)
+
+                results["decode_block_size"] = _fastest(
+                    BLOCK_SIZE_CANDIDATES, lambda size: self._decode(path, size)
+                )
+                self.progress_updated.emit(40)
+
+            results.update(self._tune_inference())
+            self.progress_updated.emit(100)
+
+            self.settings.set_performance(results)
+            self.calibration_finished.emit(results)
+        except Exception as e:
+            self.error_occurred.emit(str(e))
+
+    @staticmethod
+    def _decode(path: str, block_size: int) -> None:
+        # Same work as the canvas decode worker: blocks, store and peaks
+        with open_source(path) as source:
+            for _ in TrackDecoder(source).blocks(block_size):
+                pass
+
+    def _tune_inference(self) -> Dict[str, Any]:
+        if self.model_factory is None:
+            return {}
+        model = self.model_factory()
+        model.eval()
+        store = SampleStore.allocate(
+            BENCHMARK_SECONDS * BENCHMARK_RATE, 2, BENCHMARK_RATE
+        )
+        try:
+            separate_segment(model, store, 0, BENCHMARK_RATE, MODEL_CONTEXT_SECONDS)
+        except Exception:
+            # The selected model does not take audio; keep inference defaults
+            return {}
+
+        def infer(chunk_seconds: float) -> None:
+            chunk = int(chunk_seconds * BENCHMARK_RATE)
+            for start in range(0, store.frames, chunk):
+                stop = min(start + chunk, store.frames)
+                separate_segment(model, store, start, stop, MODEL_CONTEXT_SECONDS)
+
+        previous_threads = torch.get_num_threads()
+        try:
+            threads = _fastest(
+                _thread_candidates(),
+                lambda count: (torch.set_num_threads(count), infer(10.0)),
+            )
+            self.progress_updated.emit(70)
+            torch.set_num_threads(threads)
+            chunk_seconds = _fastest(CHUNK_SECONDS_CANDIDATES, infer)
+        finally:
+            torch.set_num_threads(previous_threads)
+        return {"torch_threads": threads, "chunk_seconds": chunk_seconds}
@@ -1,5 +1,8 @@
 # core/main_window.py
-from PyQt6.QtCore import Qt, pyqtSlot
+import os
+
+from PyQt6.QtCore import Qt, QThread, pyqtSlot
+from PyQt6.QtGui import QCloseEvent
 from PyQt6.QtWidgets import (
     QLabel,
     QMainWindow,
@@ -9,15 +12,29 @@ from PyQt6.QtWidgets import (
     QWidget,
     QStackedWidget,
 )
+from core.autotune import AutoTuner, apply_thread_settings
 from core.settings import AppSettings
 from gui.widgets.setup import SetupWidget
 from gui.widgets.toolbar import CustomToolBar
+from modules.audio.fingerprint import FingerprintIndex
+from modules.event_bus import COLLECT, LATEST, PROGRESS, EventBus
+from modules.file_processor import FileProcessor
+from modules.job_scheduler import DEFAULT_DATA_DIR, JobScheduler
+from modules.model_manager import ModelManager
+from modules.prefetcher import Prefetcher
+
+STEMS_DIR = os.path.join(DEFAULT_DATA_DIR, "stems")
 
 
 class MainWindow(QMainWindow):
     def __init__(self, settings: AppSettings):
         super().__init__()
         self.settings = settings
+        self.calibration_thread = None
+        self.model_manager = ModelManager(self, self.settings)
+        self.prefetcher = Prefetcher(self.model_manager, self.settings, self)
+        self.selected_file = None
+        self.event_bus = EventBus(self)
 
         self.setWindowTitle("Music Separation App")
         self.resize(1200, 800)
@@ -63,7 +80,193 @@ class MainWindow(QMainWindow):
 
     def _connect_signals(self):
         # Connect toolbar actions
-        pass
+        self.toolbar.calibrate_button.clicked.connect(self.start_calibration)
+
+        # Dropped files are scanned on a worker thread, one batch at a time
+        self.file_thread = QThread()
+        self.fingerprints = FingerprintIndex(
+            os.path.join(DEFAULT_DATA_DIR, "fingerprints.sqlite")
+        )
+        self.file_processor = FileProcessor(self.fingerprints)
+        self.file_processor.moveToThread(self.file_thread)
+        self.file_thread.finished.connect(self.file_processor.deleteLater)
+
+        drop_area = self.setup_widget.drop_area
+        drop_area.filesDropped.connect(self.file_processor.process_files)
+        # Failed files are forgotten, so dropping them again retries them
+        self.file_processor.processing_failed.connect(drop_area.ingestion.release)
+        self.file_thread.start()
+
+        # Whole tracks are separated chunk by chunk into stem files, with
+        # checkpoints, instead of in one forward pass held in memory
+        self.scheduler = JobScheduler(
+            self.model_manager,
+            max_concurrent=self.settings.get_performance("max_concurrent_jobs"),
+            chunk_seconds=self.settings.get_performance("chunk_seconds"),
+            fingerprints=self.fingerprints,
+            parent=self,
+        )
+
+        self._connect_event_bus()
+
+        # Decode the chosen file and warm up the chosen model while the
+        # user is still setting up the separation
+        self.setup_widget.file_selector.fileSelected.connect(self._on_file_selected)
+        drop_area.filesDropped.connect(self._on_files_dropped)
+        self.toolbar.model_selector.currentTextChanged.connect(
+            self.prefetcher.set_model
+        )
+        self.setup_widget.process_button.clicked.connect(self._start_separation)
+        self.prefetcher.ready.connect(self._on_prefetch_ready)
+        self.prefetcher.error_occurred.connect(self._on_separation_error)
+        self.model_manager.range_separated.connect(self._on_separation_finished)
+        self.model_manager.error_occurred.connect(self._on_separation_error)
+        self.scheduler.job_finished.connect(self._on_job_finished)
+        self.scheduler.error_occurred.connect(self._on_separation_error)
+
+    def _connect_event_bus(self):
+        # High-frequency signals reach the GUI at most once per frame.
+        # Views and converters route their own sources into the
+        # "selection" and "conversion_progress" topics registered here.
+        bus = self.event_bus
+        bus.register("files_indexed", COLLECT)
+        bus.register("file_progress", PROGRESS, key_index=1)
+        bus.register("conversion_progress", LATEST)
+        bus.register("model_results", COLLECT)
+        bus.register("job_progress", PROGRESS, key_index=0)
+        bus.register("selection", LATEST)
+        bus.register("levels", LATEST)
+
+        bus.add_source(self.file_processor.processing_finished, "files_indexed")
+        bus.add_source(self.file_processor.progress_updated, "file_progress")
+        bus.add_source(self.model_manager.model_run_finished, "model_results")
+        bus.add_source(self.scheduler.job_progress, "job_progress")
+        bus.add_source(self.setup_widget.levels_changed, "levels")
+
+        bus.subscribe("files_indexed", self._on_files_indexed)
+        bus.subscribe("file_progress", self._on_file_progress)
+        bus.subscribe("conversion_progress", self.setup_widget.progress_bar.setValue)
+        bus.subscribe("model_results", lambda results: self._on_process_finished())
+        bus.subscribe("job_progress", self._on_job_progress)
+
+    def connect_audio_processor(self, processor) -> None:
+        """Show an AudioProcessor's conversion progress, once per frame."""
+        self.event_bus.add_source(processor.progress_updated, "conversion_progress")
+
+    def _on_files_indexed(self, results) -> None:
+        ingestion = self.setup_widget.drop_area.ingestion
+        for file_path, metadata in results:
+            ingestion.mark_indexed(file_path, metadata)
+
+    def _on_file_progress(self, progress) -> None:
+        # Last (percent, file) per file scanned during this frame
+        percent, file_path = list(progress.values())[-1]
+        self.status_bar.showMessage(f"Scanning {file_path}... {percent}%")
+
+    @pyqtSlot(str)
+    def _on_file_selected(self, file_path: str) -> None:
+        self.selected_file = file_path
+        self.prefetcher.prefetch(file_path, self.toolbar.model_selector.currentText())
+
+    @pyqtSlot(list)
+    def _on_files_dropped(self, files) -> None:
+        if self.selected_file is None and files:
+            self._on_file_selected(files[0])
+
+    @pyqtSlot()
+    def _start_separation(self) -> None:
+        if self.selected_file is None:
+            self.status_bar.showMessage("Select an audio file first")
+            return
+        self.status_bar.showMessage("Preparing separation...")
+        self.prefetcher.request(
+            self.selected_file, self.toolbar.model_selector.currentText()
+        )
+
+    @pyqtSlot(object, str, object)
+    def _on_prefetch_ready(self, track, model_name, model) -> None:
+        self.model_manager.use_model(model_name, model)
+        self._on_process_started()
+        base = os.path.splitext(os.path.basename(track.path))[0]
+        self.scheduler.submit(
+            track.path,
+            model_name,
+            os.path.join(STEMS_DIR, base),
+            store=track.model_input,
+        )
+
+    def _on_job_progress(self, progress) -> None:
+        # Last (job, percent) per job updated during this frame
+        job_id, percent = list(progress.values())[-1]
+        self.status_bar.showMessage(f"Separating... {percent}%")
+
+    @pyqtSlot(int, object)
+    def _on_job_finished(self, job_id, outputs) -> None:
+        self._on_process_finished()
+
+    @pyqtSlot(str, float, float, object)
+    def _on_separation_finished(self, track_id, start, end, stems) -> None:
+        self._on_process_finished()
+
+    @pyqtSlot(str)
+    def _on_separation_error(self, message: str) -> None:
+        self.status_bar.showMessage(f"Separation failed: {message}")
+
+    @pyqtSlot()
+    def start_calibration(self) -> None:
+        """Benchmark this machine in the background and store the results."""
+        if self.calibration_thread is not None:
+            return
+        model_name = self.toolbar.model_selector.currentText()
+        model_manager = ModelManager()
+
+        self.calibration_thread = QThread(self)
+        self.calibration = AutoTuner(
+            self.settings, lambda: model_manager.create_model(model_name)
+        )
+        self.calibration.moveToThread(self.calibration_thread)
+        self.calibration_thread.started.connect(self.calibration.run)
+        self.calibration.progress_updated.connect(self._on_calibration_progress)
+        self.calibration.calibration_finished.connect(self._on_calibration_finished)
+        self.calibration.error_occurred.connect(self._on_calibration_error)
+        self.calibration.calibration_finished.connect(self.calibration_thread.quit)
+        self.calibration.error_occurred.connect(self.calibration_thread.quit)
+        self.calibration_thread.finished.connect(self._on_calibration_thread_finished)
+
+        self.toolbar.calibrate_button.setEnabled(False)
+        self.calibration_thread.start()
+
+    @pyqtSlot(int)
+    def _on_calibration_progress(self, value: int) -> None:
+        self.status_bar.showMessage(f"Calibrating performance settings... {value}%")
+
+    @pyqtSlot(object)
+    def _on_calibration_finished(self, results) -> None:
+        apply_thread_settings(self.settings)
+        self.status_bar.showMessage("Calibration finished", 5000)
+
+    @pyqtSlot(str)
+    def _on_calibration_error(self, message: str) -> None:
+        self.status_bar.showMessage(f"Calibration failed: {message}", 5000)
+
+    @pyqtSlot()
+    def _on_calibration_thread_finished(self) -> None:
+        self.calibration.deleteLater()
+        self.calibration_thread.deleteLater()
+        self.calibration_thread = None
+        self.toolbar.calibrate_button.setEnabled(True)
+
+    def closeEvent(self, event: QCloseEvent) -> None:
+        if self.calibration_thread is not None:
+            self.calibration_thread.quit()
+            self.calibration_thread.wait()
+        self.prefetcher.shutdown()
+        self.scheduler.shutdown()
+        self.setup_widget.drop_area.ingestion.shutdown()
+        self.file_thread.quit()
+        self.file_thread.wait()
+        self.fingerprints.close()
+        super().closeEvent(event)
 
     @pyqtSlot()
     def _show_setup(self):
@@ -1,8 +1,20 @@
 # core/settings.py
-from typing import cast
+from typing import Any, Dict, cast
 
 from PyQt6.QtCore import QObject, QSettings
 
+# Performance knobs and their defaults; the auto-tuner overwrites them
+PERFORMANCE_DEFAULTS: Dict[str, Any] = {
+    "torch_threads": 0,
+    "decode_block_size": 65536,
+    "chunk_seconds": 30.0,
+    "max_concurrent_jobs": 1,
+    "export_workers": 4,
+    "ingestion_batch_size": 64,
+    "spectrogram_cache_tiles": 256,
+    "segment_cache_mb": 512,
+}
+
 
 class AppSettings(QObject):
     def __init__(self) -> None:
@@ -171,5 +183,25 @@ class AppSettings(QObject):
         }
     """
 
+    def get_performance(self, key: str) -> Any:
+        """Return a tuned performance setting, or its default."""
+        default = PERFORMANCE_DEFAULTS[key]
+        return self.qsettings.value(
+            f"performance/{key}", default, type=type(default)
+        )
+
+    def set_performance(self, values: Dict[str, Any]) -> None:
+        for key, value in values.items():
+            if key not in PERFORMANCE_DEFAULTS:
+                raise KeyError(f"Unknown performance setting: {key}")
+            self.qsettings.setValue(f"performance/{key}", value)
+        self.qsettings.setValue("performance/calibrated", True)
+        self.qsettings.sync()
+
+    def is_calibrated(self) -> bool:
+        return cast(
+            bool, self.qsettings.value("performance/calibrated", False, type=bool)
+        )
+
     def save(self) -> None:
         self.qsettings.sync()
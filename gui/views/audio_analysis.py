@@ -1,18 +1,36 @@
 # gui/views/audio_analysis.py
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
+import pyqtgraph as pg
 from PyQt6.QtWidgets import QHBoxLayout, QLabel, QVBoxLayout, QWidget
 
 from core.settings import AppSettings
+from modules.audio.loader import MemorySource
+from modules.audio.visualization import SpectrogramView
 from modules.canvas_manager import CanvasManager
+from modules.event_bus import EventBus
 
 
 class AudioAnalysisView(QWidget):
-    def __init__(self, metadata: Dict[str, Any], settings: AppSettings, parent=None):
+    def __init__(
+        self,
+        metadata: Dict[str, Any],
+        settings: AppSettings,
+        parent=None,
+        event_bus: Optional[EventBus] = None,
+    ):
         super().__init__(parent)
         self.settings = settings
         self.metadata = metadata
+        self.event_bus = event_bus
         self.canvas = CanvasManager(settings)
+        self.spectrogram_widget = pg.PlotWidget()
+        self.spectrogram_widget.setXLink(self.canvas.plot_widget)
+        self.spectrogram = SpectrogramView(
+            self.spectrogram_widget.getPlotItem(),
+            max_tiles=settings.get_performance("spectrogram_cache_tiles"),
+            parent=self,
+        )
         self._init_ui()
         self._connect_signals()
 
@@ -28,10 +46,19 @@ class AudioAnalysisView(QWidget):
 
         # Canvas
         layout.addWidget(self.canvas.plot_widget)
+        layout.addWidget(self.spectrogram_widget)
         self.setLayout(layout)
 
     def _connect_signals(self) -> None:
         self.settings.theme_changed.connect(self._update_theme)
+        self.canvas.loading_finished.connect(self._on_audio_loaded)
+        if self.event_bus is not None:
+            # Region drags fire on every mouse move; listeners get the
+            # latest selection once per frame
+            self.event_bus.add_source(self.canvas.selection_changed, "selection")
+
+    def _on_audio_loaded(self) -> None:
+        self.spectrogram.set_source(MemorySource(self.canvas.store))
 
     def _update_theme(self) -> None:
         self.canvas.apply_theme(self.settings.get_theme())
@@ -18,6 +18,8 @@ from PyQt6.QtWidgets import (
     QWidget,
 )
 
+from modules.ingestion import DropIngestionQueue
+
 
 class CyberButton(QPushButton):
     """Custom styled button with optional icon."""
@@ -159,6 +161,9 @@ class DragDropWidget(QWidget):
 
         self.setMinimumHeight(150)
 
+        self.ingestion = DropIngestionQueue(self.accept_extensions, parent=self)
+        self.ingestion.batch_ready.connect(self.filesDropped)
+
     def dragEnterEvent(self, event: QDragEnterEvent) -> None:
         if event.mimeData().hasUrls():
             valid_files = self._validate_urls(event.mimeData().urls())
@@ -167,22 +172,26 @@ class DragDropWidget(QWidget):
 
     def dropEvent(self, event: QDropEvent) -> None:
         if event.mimeData().hasUrls():
-            file_paths = []
-            for url in event.mimeData().urls():
-                file_path = url.toLocalFile()
-                if self._is_valid_file(file_path):
-                    file_paths.append(file_path)
-
-            if file_paths:
-                self.filesDropped.emit(file_paths)
+            # Folder expansion and de-duplication happen on the ingestion
+            # thread; batches come back through filesDropped.
+            paths = [
+                url.toLocalFile()
+                for url in event.mimeData().urls()
+                if url.isLocalFile()
+            ]
+            if paths:
+                self.ingestion.enqueue(paths)
                 event.acceptProposedAction()
 
     def _validate_urls(self, urls: List[QUrl]) -> bool:
         for url in urls:
-            if self._is_valid_file(url.toLocalFile()):
+            if url.isLocalFile() and self._is_candidate(url.toLocalFile()):
                 return True
         return False
 
+    def _is_candidate(self, file_path: str) -> bool:
+        return self._is_valid_file(file_path) or os.path.isdir(file_path)
+
     def _is_valid_file(self, file_path: str) -> bool:
         return any(file_path.lower().endswith(ext) for ext in self.accept_extensions)
 
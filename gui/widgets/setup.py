@@ -32,6 +32,9 @@ class SetupWidget(QWidget):
 
         # Drag & Drop area
         self.drop_area = DragDropWidget(placeholder_text="Drag & Drop Audio Files Here")
+        self.drop_area.ingestion.batch_size = self.settings.get_performance(
+            "ingestion_batch_size"
+        )
         self.file_panel.addWidget(self.drop_area)
 
         # Separation controls
@@ -27,3 +27,7 @@ class CustomToolBar(QToolBar):
 
         self.theme_button = QPushButton("Toggle Theme")
         self.addWidget(self.theme_button)
+
+        self.calibrate_button = QPushButton("Calibrate")
+        self.calibrate_button.setToolTip("Benchmark this machine and tune performance settings")
+        self.addWidget(self.calibrate_button)
@@ -0,0 +1,119 @@
+# models/model_loader.py
+import json
+import os
+import struct
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import torch
+
+# Checkpoints use the safetensors layout: an 8-byte little-endian header
+# length, a JSON header, then the raw tensor bytes.
+CHECKPOINT_SUFFIX = ".safetensors"
+
+_DTYPES = {
+    "F64": (torch.float64, np.float64),
+    "F32": (torch.float32, np.float32),
+    "F16": (torch.float16, np.float16),
+    "BF16": (torch.bfloat16, np.int16),
+    "I64": (torch.int64, np.int64),
+    "I32": (torch.int32, np.int32),
+    "I16": (torch.int16, np.int16),
+    "I8": (torch.int8, np.int8),
+    "U8": (torch.uint8, np.uint8),
+    "BOOL": (torch.bool, np.bool_),
+}
+_TORCH_TO_CODE = {torch_dtype: code for code, (torch_dtype, _) in _DTYPES.items()}
+
+
+def is_mmap_checkpoint(path: str) -> bool:
+    return path.endswith(CHECKPOINT_SUFFIX)
+
+
+def save_checkpoint(
+    state_dict: Dict[str, torch.Tensor],
+    path: str,
+    metadata: Optional[Dict[str, str]] = None,
+) -> None:
+    """
+    Write `state_dict` in a layout that `load_state_dict` can map in place.
+
+    Tensors are ordered by element size so every offset is aligned for its
+    dtype, and the header is padded to 8 bytes.
+    """
+    tensors = {
+        name: tensor.detach().cpu().contiguous()
+        for name, tensor in state_dict.items()
+    }
+    order = sorted(tensors, key=lambda name: -tensors[name].element_size())
+
+    header = {"__metadata__": dict(metadata or {})}
+    offset = 0
+    for name in order:
+        tensor = tensors[name]
+        size = tensor.numel() * tensor.element_size()
+        header[name] = {
+            "dtype": _TORCH_TO_CODE[tensor.dtype],
+            "shape": list(tensor.shape),
+            "data_offsets": [offset, offset + size],
+        }
+        offset += size
+
+    encoded = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    encoded += b" " * (-len(encoded) % 8)
+
+    partial = path + ".part"
+    with open(partial, "wb") as f:
+        f.write(struct.pack("<Q", len(encoded)))
+        f.write(encoded)
+        for name in order:
+            tensor = tensors[name]
+            if tensor.dtype == torch.bfloat16:
+                tensor = tensor.view(torch.int16)
+            f.write(tensor.numpy().tobytes())
+    os.replace(partial, path)
+
+
+def read_metadata(path: str) -> Dict[str, str]:
+    with open(path, "rb") as f:
+        (length,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(length))
+    return header.get("__metadata__", {})
+
+
+def load_state_dict(path: str) -> Tuple[Dict[str, torch.Tensor], Dict[str, str]]:
+    """
+    Map a checkpoint and return (state_dict, metadata) without copying.
+
+    Tensors are views of a copy-on-write mapping of their own. Clean pages
+    come from the OS page cache, so every process, window and model
+    opening the same file shares them, while writes stay private to one
+    model. Nothing is cached here; the mapping lives as long as its tensors.
+    """
+    with open(path, "rb") as f:
+        (length,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(length))
+    metadata = header.pop("__metadata__", {})
+
+    data = np.memmap(path, dtype=np.uint8, mode="c", offset=8 + length)
+    state_dict = {}
+    for name, info in header.items():
+        torch_dtype, np_dtype = _DTYPES[info["dtype"]]
+        begin, end = info["data_offsets"]
+        array = data[begin:end].view(np_dtype).reshape(info["shape"])
+        tensor = torch.from_numpy(array)
+        if torch_dtype == torch.bfloat16:
+            tensor = tensor.view(torch.bfloat16)
+        state_dict[name] = tensor
+    return state_dict, metadata
+
+
+def load_into(model: torch.nn.Module, path: str) -> torch.nn.Module:
+    """Point `model`'s parameters at the mapped checkpoint tensors."""
+    state_dict, _ = load_state_dict(path)
+    try:
+        model.load_state_dict(state_dict, assign=True)
+    except TypeError:
+        # torch < 2.1 has no assign=; fall back to copying the weights
+        model.load_state_dict(state_dict)
+    return model
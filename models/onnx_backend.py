@@ -0,0 +1,137 @@
+# models/onnx_backend.py
+import os
+import statistics
+import threading
+import time
+from typing import Dict, Tuple
+
+import numpy as np
+import torch
+
+# onnx and onnxruntime are optional; they are imported when first used so
+# the torch backend works without them.
+
+ONNX_SUFFIX = ".onnx"
+ONNX_OPSET = 17
+PARITY_RTOL = 1e-3
+PARITY_ATOL = 1e-4
+
+_sessions: Dict[Tuple[str, int, int, int], "OnnxModel"] = {}
+_sessions_lock = threading.Lock()
+
+
+def export_onnx(
+    model: torch.nn.Module, path: str, example_input: torch.Tensor
+) -> str:
+    """
+    Export `model` to ONNX with the batch and time (last) axes of its input
+    left dynamic, and check that ONNX Runtime reproduces its output on
+    `example_input`. Returns `path`.
+    """
+    model.eval()
+    time_axis = example_input.dim() - 1
+    partial = path + ".part"
+    kwargs = dict(
+        input_names=["audio"],
+        output_names=["output"],
+        dynamic_axes={"audio": {0: "batch", time_axis: "frames"}},
+        opset_version=ONNX_OPSET,
+    )
+    with torch.no_grad():
+        try:
+            # torch >= 2.9 defaults to the dynamo exporter, which needs
+            # onnxscript; the TorchScript exporter is enough here
+            torch.onnx.export(model, example_input, partial, dynamo=False, **kwargs)
+        except TypeError:
+            torch.onnx.export(model, example_input, partial, **kwargs)
+    try:
+        check_parity(model, OnnxModel(partial), example_input)
+    except Exception:
+        os.remove(partial)
+        raise
+    os.replace(partial, path)
+    return path
+
+
+class OnnxModel:
+    """
+    ONNX Runtime session on the CPU execution provider, callable like the
+    torch module it was exported from.
+    """
+
+    def __init__(self, path: str, threads: int = 0):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.path = path
+        self.session = ort.InferenceSession(
+            path, options, providers=["CPUExecutionProvider"]
+        )
+        self.input_name = self.session.get_inputs()[0].name
+
+    def eval(self) -> "OnnxModel":
+        return self
+
+    def __call__(self, x) -> torch.Tensor:
+        if isinstance(x, torch.Tensor):
+            x = x.detach().cpu().numpy()
+        output = self.session.run(
+            None, {self.input_name: np.ascontiguousarray(x, dtype=np.float32)}
+        )[0]
+        return torch.from_numpy(output)
+
+
+def load_session(path: str, threads: int = 0) -> OnnxModel:
+    """Return the cached session for this version of `path`."""
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size, threads)
+    with _sessions_lock:
+        if key not in _sessions:
+            _sessions[key] = OnnxModel(path, threads)
+        return _sessions[key]
+
+
+def check_parity(
+    model: torch.nn.Module,
+    onnx_model: OnnxModel,
+    example_input: torch.Tensor,
+    rtol: float = PARITY_RTOL,
+    atol: float = PARITY_ATOL,
+) -> float:
+    """
+    Compare both backends on `example_input`; returns the largest absolute
+    difference and raises ValueError when outputs do not match.
+    """
+    with torch.no_grad():
+        expected = model(example_input).cpu().numpy()
+    actual = onnx_model(example_input).numpy()
+    if expected.shape != actual.shape:
+        raise ValueError(
+            f"ONNX output shape {actual.shape} does not match torch {expected.shape}"
+        )
+    error = float(np.max(np.abs(expected - actual))) if expected.size else 0.0
+    if not np.allclose(actual, expected, rtol=rtol, atol=atol):
+        raise ValueError(f"ONNX output differs from torch by up to {error:.3g}")
+    return error
+
+
+def benchmark(
+    model: torch.nn.Module,
+    onnx_model: OnnxModel,
+    example_input: torch.Tensor,
+    runs: int = 10,
+) -> Dict[str, float]:
+    """Median seconds per forward pass for the torch and ONNX backends."""
+    timings = {}
+    for name, run in (("torch", model), ("onnxruntime", onnx_model)):
+        with torch.no_grad():
+            run(example_input)  # warm-up
+            samples = []
+            for _ in range(runs):
+                started = time.perf_counter()
+                run(example_input)
+                samples.append(time.perf_counter() - started)
+        timings[name] = statistics.median(samples)
+    return timings
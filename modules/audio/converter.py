@@ -0,0 +1,219 @@
+# modules/audio/converter.py
+import math
+from typing import Iterator, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+
+from modules.audio.loader import DEFAULT_BLOCK_SIZE, AudioSource, convert_dtype
+
+HALF_TAPS = 16
+KAISER_BETA = 8.6
+
+
+def _design_taps(up: int, down: int, half_taps: int, beta: float):
+    """Kaiser-windowed sinc, one row of 2 * half coefficients per phase."""
+    cutoff = min(1.0, up / down)
+    half = int(math.ceil(half_taps / cutoff))
+    phase = np.arange(up)[:, np.newaxis] / up
+    k = np.arange(2 * half)[np.newaxis, :]
+    # Distance from the output instant to each input sample in the window
+    distance = phase + (half - 1 - k)
+    x = np.clip(1.0 - (distance / half) ** 2, 0.0, 1.0)
+    taps = cutoff * np.sinc(cutoff * distance) * np.i0(beta * np.sqrt(x))
+    taps /= taps.sum(axis=1, keepdims=True)
+    return taps.astype(np.float32), half
+
+
+class PolyphaseResampler:
+    """
+    Streaming rational-ratio resampler.
+
+    Output n sits at input position n * down / up; it is the dot product of
+    the 2 * half input samples around that position with the filter phase
+    for its fractional part. Blocks of any size can be fed; the input tail
+    needed by the next outputs is carried between calls.
+    """
+
+    def __init__(
+        self,
+        in_rate: int,
+        out_rate: int,
+        channels: int,
+        half_taps: int = HALF_TAPS,
+        beta: float = KAISER_BETA,
+    ):
+        g = math.gcd(in_rate, out_rate)
+        self.up = out_rate // g
+        self.down = in_rate // g
+        self.channels = channels
+        self.taps, self.half = _design_taps(self.up, self.down, half_taps, beta)
+        self.reset()
+
+    @property
+    def passthrough(self) -> bool:
+        return self.up == self.down
+
+    def reset(self) -> None:
+        self._history = np.zeros((self.half, self.channels), dtype=np.float32)
+        self._history_start = -self.half
+        self._next_out = 0
+        self._consumed = 0
+
+    def output_frames(self, input_frames: int) -> int:
+        return -(-input_frames * self.up // self.down)
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """Resample a (frames, channels) float32 block."""
+        if self.passthrough:
+            return block
+        self._consumed += len(block)
+        buffer = np.concatenate([self._history, block.astype(np.float32, copy=False)])
+        end = self._history_start + len(buffer)
+
+        # Outputs whose window ends inside the buffer
+        available = end - self.half
+        stop = (available * self.up - 1) // self.down + 1 if available > 0 else 0
+        out = self.interpolate(buffer, self._history_start, self._next_out, stop)
+        self._next_out = max(stop, self._next_out)
+
+        keep = (self._next_out * self.down) // self.up - self.half + 1
+        keep = min(max(keep, self._history_start), end)
+        self._history = buffer[keep - self._history_start :]
+        self._history_start = keep
+        return out
+
+    def flush(self) -> np.ndarray:
+        """Return the remaining outputs, padding the input with silence."""
+        if self.passthrough:
+            return np.zeros((0, self.channels), dtype=np.float32)
+        expected = self.output_frames(self._consumed)
+        consumed = self._consumed
+        padding = np.zeros((self.half + 1, self.channels), dtype=np.float32)
+        out = self.process(padding)
+        self._consumed = consumed
+        return out[: max(expected - (self._next_out - len(out)), 0)]
+
+    def interpolate(
+        self, buffer: np.ndarray, buffer_start: int, first: int, stop: int
+    ) -> np.ndarray:
+        """
+        Compute outputs [first, stop) from `buffer`, whose first row holds
+        input sample `buffer_start`.
+
+        Outputs `up` apart share a filter phase and their windows advance by
+        exactly `down` inputs, so each phase is one strided view of the
+        buffer contracted with its taps.
+        """
+        out = np.empty((max(stop - first, 0), self.channels), dtype=np.float32)
+        buffer = np.ascontiguousarray(buffer, dtype=np.float32)
+        width = 2 * self.half
+        row_stride, channel_stride = buffer.strides
+
+        for offset in range(min(self.up, len(out))):
+            n = first + offset
+            count = (stop - n + self.up - 1) // self.up
+            position = n * self.down
+            window_start = position // self.up - self.half + 1 - buffer_start
+            last = window_start + (count - 1) * self.down + width
+            if window_start < 0 or last > len(buffer):
+                raise ValueError("Buffer does not cover the requested outputs")
+
+            windows = as_strided(
+                buffer[window_start:],
+                shape=(count, width, self.channels),
+                strides=(self.down * row_stride, row_stride, channel_stride),
+                writeable=False,
+            )
+            out[offset :: self.up] = np.tensordot(
+                windows, self.taps[position % self.up], axes=([1], [0])
+            )
+        return out
+
+
+class ChannelMixer:
+    """
+    Up/down-mixes channels with a fixed matrix.
+
+    Downmixing averages the inputs that fold onto each output (i % out);
+    upmixing repeats inputs cyclically, so mono becomes dual mono.
+    """
+
+    def __init__(self, in_channels: int, out_channels: int):
+        self.in_channels = in_channels
+        self.out_channels = out_channels
+        matrix = np.zeros((in_channels, out_channels), dtype=np.float32)
+        if out_channels >= in_channels:
+            for j in range(out_channels):
+                matrix[j % in_channels, j] = 1.0
+        else:
+            for i in range(in_channels):
+                matrix[i, i % out_channels] = 1.0
+            matrix /= matrix.sum(axis=0, keepdims=True)
+        self.matrix = matrix
+
+    @property
+    def passthrough(self) -> bool:
+        return self.in_channels == self.out_channels
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        if self.passthrough:
+            return block
+        return block @ self.matrix
+
+
+class ConvertingSource(AudioSource):
+    """
+    Presents another AudioSource at a different sample rate and channel
+    count, converting block by block in-process.
+    """
+
+    def __init__(self, source: AudioSource, sample_rate: int, channels: int):
+        self.source = source
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.mixer = ChannelMixer(source.channels, channels)
+        self.resampler = PolyphaseResampler(source.sample_rate, sample_rate, channels)
+        self.frames = self.resampler.output_frames(source.frames)
+
+    def iter_blocks(
+        self,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        start: int = 0,
+        dtype: str = "float32",
+    ) -> Iterator[Tuple[int, np.ndarray]]:
+        if start:
+            yield from super().iter_blocks(block_size, start, dtype)
+            return
+
+        resampler = PolyphaseResampler(
+            self.source.sample_rate, self.sample_rate, self.channels
+        )
+        position = 0
+        for _, block in self.source.iter_blocks(block_size):
+            out = resampler.process(self.mixer.process(block))
+            if len(out):
+                yield position, convert_dtype(out, dtype)
+                position += len(out)
+        out = resampler.flush()
+        if len(out):
+            yield position, convert_dtype(out, dtype)
+
+    def read(self, start: int, frames: int, dtype: str = "float32") -> np.ndarray:
+        stop = min(start + frames, self.frames)
+        resampler = self.resampler
+        if resampler.passthrough or stop <= start:
+            block = self.source.read(start, max(stop - start, 0))
+            return convert_dtype(self.mixer.process(block), dtype)
+
+        # Input window covering every tap of outputs [start, stop)
+        first = (start * resampler.down) // resampler.up - resampler.half + 1
+        last = ((stop - 1) * resampler.down) // resampler.up + resampler.half + 1
+        lo, hi = max(first, 0), min(last, self.source.frames)
+        buffer = np.zeros((last - first, self.channels), dtype=np.float32)
+        block = self.mixer.process(self.source.read(lo, hi - lo))
+        buffer[lo - first : lo - first + len(block)] = block
+        return convert_dtype(resampler.interpolate(buffer, first, start, stop), dtype)
+
+    def close(self) -> None:
+        self.source.close()
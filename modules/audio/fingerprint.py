@@ -0,0 +1,308 @@
+# modules/audio/fingerprint.py
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from modules.audio.converter import ConvertingSource
+from modules.audio.loader import AudioSource, decode
+
+# Fingerprints are taken from a mono 11025 Hz rendition, so the same song
+# in any format, rate or channel layout produces the same hashes
+FINGERPRINT_RATE = 11025
+FINGERPRINT_FFT_SIZE = 1024
+FINGERPRINT_HOP = 256
+# Neighbourhood (frames, bins) a spectral peak must dominate
+PEAK_NEIGHBOURHOOD = (11, 11)
+PEAK_FLOOR_DB = -60.0
+PEAKS_PER_FRAME = 5
+# Each anchor peak is paired with the next FAN_OUT peaks within MAX_DELTA
+FAN_OUT = 8
+MAX_DELTA = 63
+MIN_MATCH_VOTES = 20
+# The winning (track, offset) must beat the runner-up by this factor
+MIN_MATCH_MARGIN = 4.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tracks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    path TEXT NOT NULL UNIQUE,
+    duration REAL NOT NULL,
+    mtime REAL NOT NULL DEFAULT 0,
+    hash_count INTEGER NOT NULL,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS stems (
+    track_id INTEGER NOT NULL,
+    model TEXT NOT NULL,
+    paths TEXT NOT NULL,
+    PRIMARY KEY (track_id, model)
+);
+CREATE TABLE IF NOT EXISTS hashes (
+    hash INTEGER NOT NULL,
+    track_id INTEGER NOT NULL,
+    frame INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS hashes_by_hash ON hashes (hash);
+CREATE INDEX IF NOT EXISTS hashes_by_track ON hashes (track_id);
+"""
+
+
+@dataclass
+class Fingerprint:
+    """Landmark hashes of a track and the frame each one starts at."""
+
+    hashes: np.ndarray
+    frames: np.ndarray
+    duration: float
+
+
+@dataclass
+class Match:
+    track_id: int
+    path: str
+    # Seconds to add to a time in the query to get the matched track's time
+    offset: float
+    votes: int
+    duration: float
+
+
+def _max_filter(values: np.ndarray, size: int, axis: int) -> np.ndarray:
+    pad = [(0, 0)] * values.ndim
+    pad[axis] = (size // 2, size // 2)
+    padded = np.pad(values, pad, constant_values=-np.inf)
+    return sliding_window_view(padded, size, axis=axis).max(axis=-1)
+
+
+def spectral_peaks(samples: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Return (frame, bin) of the local maxima of the dB spectrogram of mono
+    `samples`, sorted by frame and bin.
+    """
+    if len(samples) < FINGERPRINT_FFT_SIZE:
+        return np.empty(0, np.int64), np.empty(0, np.int64)
+    window = np.hanning(FINGERPRINT_FFT_SIZE).astype(np.float32)
+    frames = sliding_window_view(samples, FINGERPRINT_FFT_SIZE)[::FINGERPRINT_HOP]
+    spectrum = np.abs(np.fft.rfft(frames * window, axis=1))
+    db = 20.0 * np.log10(spectrum + 1e-9)
+    db -= db.max()
+
+    # A rectangular max filter is separable: filter time, then frequency
+    neighbourhood = _max_filter(db, PEAK_NEIGHBOURHOOD[0], axis=0)
+    neighbourhood = _max_filter(neighbourhood, PEAK_NEIGHBOURHOOD[1], axis=1)
+    candidates = np.where(
+        (db == neighbourhood) & (db > PEAK_FLOOR_DB), db, -np.inf
+    )
+
+    # Keep the strongest few peaks of each frame so noise cannot flood the
+    # fingerprint with weak landmarks
+    keep = min(PEAKS_PER_FRAME, candidates.shape[1])
+    strongest = np.argpartition(candidates, -keep, axis=1)[:, -keep:]
+    strongest.sort(axis=1)
+    rows = np.repeat(np.arange(len(candidates)), keep)
+    bins = strongest.ravel()
+    valid = np.isfinite(candidates[rows, bins])
+    return rows[valid].astype(np.int64), bins[valid].astype(np.int64)
+
+
+def landmark_hashes(
+    time_index: np.ndarray, bin_index: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pair every peak with the FAN_OUT peaks following it and pack
+    (bin, bin, frame delta) into one integer per pair.
+    """
+    hashes, frames = [], []
+    for step in range(1, FAN_OUT + 1):
+        t1, f1 = time_index[:-step], bin_index[:-step]
+        t2, f2 = time_index[step:], bin_index[step:]
+        delta = t2 - t1
+        valid = (delta > 0) & (delta <= MAX_DELTA)
+        hashes.append((f1[valid] << 16) | (f2[valid] << 6) | delta[valid])
+        frames.append(t1[valid])
+    if not hashes:
+        return np.empty(0, np.int64), np.empty(0, np.int64)
+    return np.concatenate(hashes), np.concatenate(frames)
+
+
+def fingerprint(source: AudioSource) -> Fingerprint:
+    """Decode `source` at the fingerprint rate and hash its spectral peaks."""
+    store = decode(ConvertingSource(source, FINGERPRINT_RATE, 1))
+    time_index, bin_index = spectral_peaks(store.read(channel=0))
+    hashes, frames = landmark_hashes(time_index, bin_index)
+    return Fingerprint(hashes, frames, store.duration)
+
+
+def refine_offset(
+    reference: np.ndarray,
+    query: np.ndarray,
+    coarse: int,
+    search: int,
+    excerpt_frames: int = 1 << 19,
+) -> int:
+    """
+    Refine `coarse` (frames to add to a query position to get the reference
+    position) to sample accuracy by cross-correlating mono signals within
+    +-`search` frames over at most `excerpt_frames` of the query.
+    """
+    start = max(0, search - coarse)
+    stop = min(len(query), len(reference) - coarse - search, start + excerpt_frames)
+    if stop - start < search:
+        return coarse
+    excerpt = query[start:stop]
+    window = reference[start + coarse - search : stop + coarse + search]
+    size = 1 << int(np.ceil(np.log2(len(window) + len(excerpt))))
+    correlation = np.fft.irfft(
+        np.fft.rfft(window, size) * np.conj(np.fft.rfft(excerpt, size)), size
+    )[: 2 * search + 1]
+    return coarse - search + int(np.argmax(correlation))
+
+
+class FingerprintIndex:
+    """
+    SQLite inverted index from landmark hash to (track, frame), with the
+    stems each model produced for each track; safe to share between threads.
+    """
+
+    def __init__(self, db_path: str):
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+            self._conn.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS query (hash INTEGER, frame INTEGER)"
+            )
+
+    def add(self, path: str, landmarks: Fingerprint, mtime: float = 0.0) -> int:
+        """Index `path`, replacing any earlier fingerprint of it."""
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT id FROM tracks WHERE path = ?", (path,)
+            ).fetchone()
+            if row is not None:
+                self._conn.execute("DELETE FROM hashes WHERE track_id = ?", (row["id"],))
+                self._conn.execute("DELETE FROM stems WHERE track_id = ?", (row["id"],))
+                self._conn.execute(
+                    "UPDATE tracks SET duration = ?, mtime = ?, hash_count = ?"
+                    " WHERE id = ?",
+                    (landmarks.duration, mtime, len(landmarks.hashes), row["id"]),
+                )
+                track_id = row["id"]
+            else:
+                track_id = self._conn.execute(
+                    "INSERT INTO tracks (path, duration, mtime, hash_count, created)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (path, landmarks.duration, mtime, len(landmarks.hashes), time.time()),
+                ).lastrowid
+            self._conn.executemany(
+                "INSERT INTO hashes (hash, track_id, frame) VALUES (?, ?, ?)",
+                zip(
+                    landmarks.hashes.tolist(),
+                    [track_id] * len(landmarks.hashes),
+                    landmarks.frames.tolist(),
+                ),
+            )
+        return track_id
+
+    def match(self, landmarks: Fingerprint, exclude: Optional[str] = None) -> Optional[Match]:
+        """
+        Return the indexed track most hash pairs agree on at one time
+        offset, or None when no track gets enough consistent votes.
+        """
+        if len(landmarks.hashes) == 0:
+            return None
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM query")
+            self._conn.executemany(
+                "INSERT INTO query (hash, frame) VALUES (?, ?)",
+                zip(landmarks.hashes.tolist(), landmarks.frames.tolist()),
+            )
+            rows = self._conn.execute(
+                "SELECT h.track_id, h.frame - q.frame FROM query q"
+                " JOIN hashes h ON h.hash = q.hash"
+                " JOIN tracks t ON t.id = h.track_id WHERE t.path IS NOT ?",
+                (exclude,),
+            ).fetchall()
+            self._conn.execute("DELETE FROM query")
+        if not rows:
+            return None
+
+        # Votes per (track, offset); a true match piles up on one offset
+        pairs = np.array(rows, dtype=np.int64)
+        keys, votes = np.unique(pairs, axis=0, return_counts=True)
+        order = np.argsort(votes)[::-1]
+        best = order[0]
+        track_id, delta = (int(value) for value in keys[best])
+        count = int(votes[best])
+        # Offsets next to the winner on the same track are the same match
+        rivals = order[1:][
+            (keys[order[1:], 0] != track_id)
+            | (np.abs(keys[order[1:], 1] - delta) > 1)
+        ]
+        runner_up = int(votes[rivals[0]]) if len(rivals) else 0
+        if count < max(MIN_MATCH_VOTES, MIN_MATCH_MARGIN * runner_up):
+            return None
+
+        track = self.track(track_id)
+        return Match(
+            track_id,
+            track["path"],
+            delta * FINGERPRINT_HOP / FINGERPRINT_RATE,
+            count,
+            track["duration"],
+        )
+
+    def track(self, track_id: int) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM tracks WHERE id = ?", (track_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(row)
+
+    def find(self, path: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id FROM tracks WHERE path = ?", (path,)
+            ).fetchone()
+        return None if row is None else self.track(row["id"])
+
+    def set_stems(self, path: str, model: str, stems: Dict[str, str]) -> None:
+        """
+        Record the stem files `model` separated from the indexed track
+        `path`. `model` identifies everything that shapes the output, e.g.
+        model name, backend and checkpoint version.
+        """
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT id FROM tracks WHERE path = ?", (path,)
+            ).fetchone()
+            if row is None:
+                return
+            self._conn.execute(
+                "INSERT OR REPLACE INTO stems (track_id, model, paths) VALUES (?, ?, ?)",
+                (row["id"], model, json.dumps(stems)),
+            )
+
+    def stems(self, track_id: int, model: str) -> Optional[Dict[str, str]]:
+        """Stem files `model` produced for the track, if any."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT paths FROM stems WHERE track_id = ? AND model = ?",
+                (track_id, model),
+            ).fetchone()
+        return None if row is None else json.loads(row["paths"])
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
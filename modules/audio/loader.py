@@ -0,0 +1,287 @@
+# modules/audio/loader.py
+import os
+import struct
+import threading
+from typing import Dict, Iterator, Optional, Tuple, Type
+
+import ffmpeg
+import numpy as np
+import soundfile as sf
+
+from modules.audio.store import INT16_SCALE, SampleStore
+
+DEFAULT_BLOCK_SIZE = 65536
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+class AudioSource:
+    """
+    Seekable, block-iterable view of a decoded audio file.
+
+    Blocks are (frames, channels) arrays of float32 or int16. Backends that
+    can hand out views of their storage do so when the requested dtype
+    matches; treat returned blocks as read-only.
+    """
+
+    frames: int = 0
+    channels: int = 0
+    sample_rate: int = 0
+
+    @property
+    def duration(self) -> float:
+        return self.frames / self.sample_rate if self.sample_rate else 0.0
+
+    def read(self, start: int, frames: int, dtype: str = "float32") -> np.ndarray:
+        raise NotImplementedError
+
+    def iter_blocks(
+        self,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        start: int = 0,
+        dtype: str = "float32",
+    ) -> Iterator[Tuple[int, np.ndarray]]:
+        """Yield (position, block) pairs from `start` to the end."""
+        for position in range(start, self.frames, block_size):
+            block = self.read(position, block_size, dtype)
+            if len(block) == 0:
+                break
+            yield position, block
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "AudioSource":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def convert_dtype(block: np.ndarray, dtype: str) -> np.ndarray:
+    """Convert a block between int16 and float32 sample formats."""
+    if block.dtype == dtype:
+        return block
+    if block.dtype == np.int16:
+        return np.multiply(block, np.float32(1.0 / INT16_SCALE))
+    if dtype == "int16":
+        scaled = np.multiply(block, INT16_SCALE, dtype=np.float32)
+        np.clip(scaled, -INT16_SCALE, INT16_SCALE - 1, out=scaled)
+        return scaled.astype(np.int16)
+    return block.astype(dtype)
+
+
+class SoundFileSource(AudioSource):
+    """libsndfile backend (WAV, FLAC, OGG and, with recent builds, MP3)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = sf.SoundFile(path)
+        self._lock = threading.Lock()
+        self.frames = self._file.frames
+        self.channels = self._file.channels
+        self.sample_rate = self._file.samplerate
+
+    def read(self, start: int, frames: int, dtype: str = "float32") -> np.ndarray:
+        with self._lock:
+            self._file.seek(start)
+            return self._file.read(frames, dtype=dtype, always_2d=True)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class MemmapWavSource(AudioSource):
+    """
+    Raw PCM16 / float32 WAV mapped straight from disk.
+
+    Reads in the file's native dtype are zero-copy views of the mapping.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        fmt, offset, size = _parse_wav_header(path)
+        format_tag, channels, sample_rate, bits = fmt
+        if (format_tag, bits) == (WAVE_FORMAT_PCM, 16):
+            dtype = np.dtype("<i2")
+        elif (format_tag, bits) == (WAVE_FORMAT_IEEE_FLOAT, 32):
+            dtype = np.dtype("<f4")
+        else:
+            raise ValueError(f"Unsupported WAV encoding in {path}")
+
+        self.channels = channels
+        self.sample_rate = sample_rate
+        self.frames = size // (dtype.itemsize * channels)
+        self._map = np.memmap(
+            path, dtype=dtype, mode="r", offset=offset, shape=(self.frames, channels)
+        )
+
+    def read(self, start: int, frames: int, dtype: str = "float32") -> np.ndarray:
+        return convert_dtype(self._map[start : start + frames], dtype)
+
+    def close(self) -> None:
+        self._map = None
+
+
+class FFmpegSource(AudioSource):
+    """
+    Decodes anything ffmpeg understands through a pipe.
+
+    Block iteration uses a single ffmpeg process; random reads seek by time
+    and are therefore accurate to ffmpeg's seeking precision.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        info = ffmpeg.probe(path)
+        stream = next(s for s in info["streams"] if s["codec_type"] == "audio")
+        self.channels = int(stream["channels"])
+        self.sample_rate = int(stream["sample_rate"])
+        duration = float(stream.get("duration", info["format"]["duration"]))
+        self.frames = int(round(duration * self.sample_rate))
+
+    def _decode(self, **input_args):
+        return (
+            ffmpeg.input(self.path, **input_args)
+            .output("pipe:", format="f32le", acodec="pcm_f32le")
+            .run_async(pipe_stdout=True, quiet=True)
+        )
+
+    def read(self, start: int, frames: int, dtype: str = "float32") -> np.ndarray:
+        process = self._decode(ss=start / self.sample_rate)
+        try:
+            raw = process.stdout.read(frames * self.channels * 4)
+        finally:
+            process.kill()
+            process.wait()
+        return convert_dtype(self._to_frames(raw), dtype)
+
+    def iter_blocks(
+        self,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        start: int = 0,
+        dtype: str = "float32",
+    ) -> Iterator[Tuple[int, np.ndarray]]:
+        process = self._decode(ss=start / self.sample_rate) if start else self._decode()
+        position = start
+        try:
+            while True:
+                raw = process.stdout.read(block_size * self.channels * 4)
+                if not raw:
+                    break
+                block = self._to_frames(raw)
+                yield position, convert_dtype(block, dtype)
+                position += len(block)
+        finally:
+            process.kill()
+            process.wait()
+
+    def _to_frames(self, raw: bytes) -> np.ndarray:
+        usable = len(raw) - len(raw) % (4 * self.channels)
+        return np.frombuffer(raw[:usable], dtype="<f4").reshape(-1, self.channels)
+
+
+class MemorySource(AudioSource):
+    """Serves an already decoded SampleStore so consumers can share it."""
+
+    def __init__(self, store: SampleStore):
+        self.store = store
+        self.frames = store.frames
+        self.channels = store.channels
+        self.sample_rate = store.sample_rate
+
+    def read(self, start: int, frames: int, dtype: str = "float32") -> np.ndarray:
+        view = self.store.samples[start : start + frames]
+        if view.dtype == dtype:
+            return view
+        if dtype == "float32":
+            return self.store.read(start, start + frames)
+        return convert_dtype(self.store.read(start, start + frames), dtype)
+
+
+BACKENDS: Dict[str, Type[AudioSource]] = {
+    "memmap": MemmapWavSource,
+    "soundfile": SoundFileSource,
+    "ffmpeg": FFmpegSource,
+}
+
+
+def register_backend(name: str, backend: Type[AudioSource]) -> None:
+    BACKENDS[name] = backend
+
+
+def open_source(path: str, backend: Optional[str] = None) -> AudioSource:
+    """
+    Open `path` with the named backend, or pick the cheapest one that works:
+    memory-mapped WAV, then libsndfile, then an ffmpeg pipe.
+    """
+    if backend is not None:
+        return BACKENDS[backend](path)
+
+    candidates = ["soundfile", "ffmpeg"]
+    if path.lower().endswith(".wav"):
+        candidates.insert(0, "memmap")
+
+    errors = []
+    for name in candidates:
+        try:
+            return BACKENDS[name](path)
+        except Exception as e:
+            errors.append(f"{name}: {e}")
+    raise RuntimeError(f"Cannot open {path} ({'; '.join(errors)})")
+
+
+def decode(
+    source: AudioSource,
+    dtype: np.dtype = np.int16,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+) -> SampleStore:
+    """Decode a whole source into a SampleStore."""
+    store = SampleStore.allocate(
+        source.frames, source.channels, source.sample_rate, dtype
+    )
+    read_dtype = "int16" if store.dtype == np.int16 else "float32"
+    end = 0
+    for position, block in source.iter_blocks(block_size, dtype=read_dtype):
+        end = position + len(block)
+        if end > store.frames:
+            # `frames` can be an estimate (see FFmpegSource); keep the audio
+            # past it rather than dropping it
+            store.resize(max(end, 2 * store.frames))
+        store.write(position, block)
+    if end < store.frames:
+        store.resize(end)
+    return store
+
+
+def _parse_wav_header(path: str):
+    with open(path, "rb") as f:
+        riff, _, wave = struct.unpack("<4sI4s", f.read(12))
+        if riff != b"RIFF" or wave != b"WAVE":
+            raise ValueError(f"{path} is not a RIFF/WAVE file")
+
+        fmt = None
+        file_size = os.fstat(f.fileno()).st_size
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError(f"No data chunk in {path}")
+            chunk_id, chunk_size = struct.unpack("<4sI", header)
+            if chunk_id == b"fmt ":
+                body = f.read(chunk_size)
+                format_tag, channels, sample_rate = struct.unpack("<HHI", body[:8])
+                bits = struct.unpack("<H", body[14:16])[0]
+                if format_tag == WAVE_FORMAT_EXTENSIBLE and len(body) >= 26:
+                    format_tag = struct.unpack("<H", body[24:26])[0]
+                fmt = (format_tag, channels, sample_rate, bits)
+            elif chunk_id == b"data":
+                if fmt is None:
+                    raise ValueError(f"Data chunk before fmt chunk in {path}")
+                offset = f.tell()
+                return fmt, offset, min(chunk_size, file_size - offset)
+            else:
+                f.seek(chunk_size, os.SEEK_CUR)
+            if chunk_size % 2:
+                f.seek(1, os.SEEK_CUR)
@@ -0,0 +1,144 @@
+# modules/audio/store.py
+from typing import Dict, Optional
+
+import numpy as np
+
+INT16_SCALE = 32768.0
+COMPACT_DTYPES = (np.dtype(np.int16), np.dtype(np.float16))
+
+
+class SampleStore:
+    """
+    Compact in-memory audio buffer.
+
+    Samples live in one contiguous (frames, channels) array of int16 for PCM
+    tracks or float16 for separated stems. Consumers never see that layout:
+    `read` upcasts only the requested slice to float32.
+    """
+
+    def __init__(self, samples: np.ndarray, sample_rate: int):
+        if samples.dtype not in COMPACT_DTYPES:
+            raise ValueError(f"Unsupported sample dtype: {samples.dtype}")
+        if samples.ndim == 1:
+            samples = samples[:, np.newaxis]
+        self.samples = np.ascontiguousarray(samples)
+        self.sample_rate = sample_rate
+
+    @classmethod
+    def allocate(
+        cls,
+        frames: int,
+        channels: int,
+        sample_rate: int,
+        dtype: np.dtype = np.int16,
+    ) -> "SampleStore":
+        return cls(np.zeros((frames, channels), dtype=dtype), sample_rate)
+
+    @classmethod
+    def from_float(
+        cls, data: np.ndarray, sample_rate: int, dtype: np.dtype = np.int16
+    ) -> "SampleStore":
+        if data.ndim == 1:
+            data = data[:, np.newaxis]
+        store = cls.allocate(data.shape[0], data.shape[1], sample_rate, dtype)
+        store.write(0, data)
+        return store
+
+    @property
+    def frames(self) -> int:
+        return self.samples.shape[0]
+
+    @property
+    def channels(self) -> int:
+        return self.samples.shape[1]
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self.samples.dtype
+
+    @property
+    def duration(self) -> float:
+        return self.frames / self.sample_rate
+
+    @property
+    def nbytes(self) -> int:
+        return self.samples.nbytes
+
+    def __len__(self) -> int:
+        return self.frames
+
+    def resize(self, frames: int) -> None:
+        """Truncate or zero-extend the buffer to `frames` frames."""
+        if frames <= self.frames:
+            self.samples = self.samples[:frames]
+            return
+        samples = np.zeros((frames, self.channels), dtype=self.dtype)
+        samples[: self.frames] = self.samples
+        self.samples = samples
+
+    def write(self, start: int, block: np.ndarray) -> None:
+        """Store a block of float or int16 frames starting at `start`."""
+        if block.ndim == 1:
+            block = block[:, np.newaxis]
+        target = self.samples[start : start + block.shape[0]]
+        if block.dtype == self.dtype:
+            target[...] = block
+        elif self.dtype == np.int16:
+            if block.dtype.kind == "f":
+                scaled = np.multiply(block, INT16_SCALE, dtype=np.float32)
+                np.clip(scaled, -INT16_SCALE, INT16_SCALE - 1, out=scaled)
+                block = scaled
+            np.copyto(target, block, casting="unsafe")
+        elif block.dtype == np.int16:
+            np.multiply(block, 1.0 / INT16_SCALE, out=target, casting="unsafe")
+        else:
+            np.copyto(target, block, casting="same_kind")
+
+    def read(
+        self,
+        start: int = 0,
+        stop: Optional[int] = None,
+        channel: Optional[int] = None,
+        out: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Return frames [start, stop) as float32.
+
+        With `channel` set a 1-D array of that channel is returned, otherwise
+        a (frames, channels) array.
+        """
+        view = self.samples[start:stop]
+        if channel is not None:
+            view = view[:, channel]
+        if out is None:
+            out = np.empty(view.shape, dtype=np.float32)
+        if self.dtype == np.int16:
+            np.multiply(view, np.float32(1.0 / INT16_SCALE), out=out)
+        else:
+            np.copyto(out, view)
+        return out
+
+
+def mix(
+    stems: Dict[str, SampleStore],
+    gains: Dict[str, float],
+    start: int = 0,
+    stop: Optional[int] = None,
+) -> np.ndarray:
+    """Sum the given range of each stem scaled by its gain, in float32."""
+    mixed: Optional[np.ndarray] = None
+    for name, store in stems.items():
+        gain = gains.get(name, 1.0)
+        if gain == 0:
+            continue
+        block = store.read(start, stop)
+        block *= np.float32(gain)
+        if mixed is None:
+            mixed = block
+        else:
+            mixed += block
+    if mixed is None:
+        first = next(iter(stems.values()))
+        stop = first.frames if stop is None else min(stop, first.frames)
+        mixed = np.zeros((max(0, stop - start), first.channels), dtype=np.float32)
+    return mixed
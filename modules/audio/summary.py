@@ -0,0 +1,121 @@
+# modules/audio/summary.py
+from dataclasses import dataclass
+
+import numpy as np
+
+from modules.audio.store import SampleStore
+
+SUMMARY_BLOCK_SIZE = 4096
+BUILD_CHUNK_BLOCKS = 256
+
+
+@dataclass
+class RegionStats:
+    start: float
+    end: float
+    rms: float
+    peak: float
+    dc_offset: float
+    loudness: float
+
+
+class SummaryIndex:
+    """
+    Precomputed block summaries of a SampleStore for fast region statistics.
+
+    Prefix sums of samples and squared samples per block give sums over any
+    run of whole blocks in O(1), and a sparse table over block peaks answers
+    range maxima in O(1). Only the partial blocks at either edge of a region
+    are read from the store, so a query never touches more than two blocks
+    of audio regardless of the region length.
+    """
+
+    def __init__(self, store: SampleStore, block_size: int = SUMMARY_BLOCK_SIZE):
+        self.store = store
+        self.block_size = block_size
+        self.blocks = store.frames // block_size
+
+        channels = store.channels
+        self.prefix_sum = np.zeros((self.blocks + 1, channels), dtype=np.float64)
+        self.prefix_sq = np.zeros((self.blocks + 1, channels), dtype=np.float64)
+        peaks = np.zeros(self.blocks, dtype=np.float32)
+
+        step = BUILD_CHUNK_BLOCKS
+        for first in range(0, self.blocks, step):
+            count = min(step, self.blocks - first)
+            frames = store.read(
+                first * block_size, (first + count) * block_size
+            ).reshape(count, block_size, channels)
+            self.prefix_sum[first + 1 : first + count + 1] = frames.sum(
+                axis=1, dtype=np.float64
+            )
+            self.prefix_sq[first + 1 : first + count + 1] = np.einsum(
+                "ijk,ijk->ik", frames, frames, dtype=np.float64
+            )
+            peaks[first : first + count] = np.abs(frames).max(axis=(1, 2))
+
+        np.cumsum(self.prefix_sum, axis=0, out=self.prefix_sum)
+        np.cumsum(self.prefix_sq, axis=0, out=self.prefix_sq)
+        self._peak_table = self._build_sparse_table(peaks)
+
+    @staticmethod
+    def _build_sparse_table(peaks: np.ndarray) -> list:
+        table = [peaks]
+        width = 1
+        while 2 * width <= len(peaks):
+            previous = table[-1]
+            table.append(np.maximum(previous[:-width], previous[width:]))
+            width *= 2
+        return table
+
+    def _block_peak(self, first: int, stop: int) -> float:
+        if stop <= first:
+            return 0.0
+        level = (stop - first).bit_length() - 1
+        row = self._peak_table[level]
+        return float(max(row[first], row[stop - (1 << level)]))
+
+    def _edge(self, start: int, stop: int):
+        if stop <= start:
+            channels = self.store.channels
+            return np.zeros(channels), np.zeros(channels), 0.0
+        frames = self.store.read(start, stop)
+        return (
+            frames.sum(axis=0, dtype=np.float64),
+            np.einsum("ij,ij->j", frames, frames, dtype=np.float64),
+            float(np.abs(frames).max()),
+        )
+
+    def stats(self, start: float, end: float) -> RegionStats:
+        """Return statistics of the region between `start` and `end` seconds."""
+        rate = self.store.sample_rate
+        first = min(max(int(start * rate), 0), self.store.frames)
+        stop = min(max(int(end * rate), first), self.store.frames)
+
+        block_first = min(-(-first // self.block_size), self.blocks)
+        block_stop = max(stop // self.block_size, block_first)
+        head_stop = min(block_first * self.block_size, stop)
+        # A region inside the trailing partial block has no whole blocks and
+        # is read entirely as tail
+        tail_start = max(block_stop * self.block_size, head_stop, first)
+
+        head_sum, head_sq, head_peak = self._edge(first, head_stop)
+        tail_sum, tail_sq, tail_peak = self._edge(tail_start, stop)
+        total = head_sum + tail_sum
+        total_sq = head_sq + tail_sq
+        total += self.prefix_sum[block_stop] - self.prefix_sum[block_first]
+        total_sq += self.prefix_sq[block_stop] - self.prefix_sq[block_first]
+        peak = max(head_peak, tail_peak, self._block_peak(block_first, block_stop))
+
+        frames = max(stop - first, 1)
+        mean_square = total_sq / frames
+        # BS.1770-style channel sum without K-weighting
+        loudness = -0.691 + 10.0 * np.log10(max(mean_square.sum(), 1e-20))
+        return RegionStats(
+            start=first / rate,
+            end=stop / rate,
+            rms=float(np.sqrt(mean_square.mean())),
+            peak=peak,
+            dc_offset=float(total.mean() / frames),
+            loudness=float(loudness),
+        )
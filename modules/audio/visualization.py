@@ -0,0 +1,336 @@
+# modules/audio/visualization.py
+from collections import OrderedDict
+from typing import Dict, Iterator, Optional, Tuple
+
+import numpy as np
+import pyqtgraph as pg
+from numpy.lib.stride_tricks import sliding_window_view
+from PyQt6.QtCore import QObject, QRectF
+
+from modules.audio.loader import AudioSource
+from modules.audio.store import SampleStore
+
+DEFAULT_SAMPLES_PER_PEAK = 512
+LANE_CHUNK_BUCKETS = 1024
+
+SPECTROGRAM_FFT_SIZE = 2048
+SPECTROGRAM_HOP = 512
+SPECTROGRAM_CACHE_TILES = 256
+TILE_COLUMNS = 256
+
+
+class PeakOverview:
+    """
+    Min/max envelope of a track, one bucket per `samples_per_peak` frames.
+
+    Blocks can be fed in decode order while the file is still being read;
+    `curve` returns the part that has been filled so far.
+    """
+
+    def __init__(
+        self,
+        frames: int,
+        channels: int,
+        sample_rate: int,
+        samples_per_peak: int = DEFAULT_SAMPLES_PER_PEAK,
+    ):
+        self.frames = frames
+        self.channels = channels
+        self.sample_rate = sample_rate
+        self.samples_per_peak = samples_per_peak
+        buckets = max(1, -(-frames // samples_per_peak))
+        self.mins = np.full((buckets, channels), np.inf, dtype=np.float32)
+        self.maxs = np.full((buckets, channels), -np.inf, dtype=np.float32)
+        self.filled = 0
+
+    @property
+    def buckets(self) -> int:
+        return self.mins.shape[0]
+
+    def update(self, start: int, block: np.ndarray) -> None:
+        """Fold float32 frames [start, start + len(block)) into the envelope."""
+        if len(block) == 0:
+            return
+        if block.ndim == 1:
+            block = block[:, np.newaxis]
+        spp = self.samples_per_peak
+        first = start // spp
+        offsets = np.arange(first * spp, start + len(block), spp) - start
+        offsets[0] = 0
+
+        rows = slice(first, first + len(offsets))
+        np.minimum(
+            self.mins[rows],
+            np.minimum.reduceat(block, offsets, axis=0),
+            out=self.mins[rows],
+        )
+        np.maximum(
+            self.maxs[rows],
+            np.maximum.reduceat(block, offsets, axis=0),
+            out=self.maxs[rows],
+        )
+        self.filled = max(self.filled, start + len(block))
+
+    def filled_buckets(self) -> int:
+        return -(-self.filled // self.samples_per_peak)
+
+    def add_lane(self, store: SampleStore, start: float = 0.0) -> int:
+        """
+        Append the mono envelope of `store` (e.g. a separated stem) as a new
+        column sharing this overview's time buckets; returns its column.
+
+        `store` begins `start` seconds into the track, as stems of a range
+        separation do; buckets it does not cover stay empty. Stores at
+        another sample rate are bucketed on the same time grid.
+        """
+        times = np.arange(self.buckets + 1) * (self.samples_per_peak / self.sample_rate)
+        edges = np.round((times - start) * store.sample_rate).astype(np.int64)
+        edges = np.clip(edges, 0, store.frames)
+        mins = np.full((self.buckets, 1), np.inf, dtype=np.float32)
+        maxs = np.full((self.buckets, 1), -np.inf, dtype=np.float32)
+
+        # Only the buckets between the start and the end of the store
+        covered = np.flatnonzero(edges[1:] > edges[:-1])
+        lo, hi = (covered[0], covered[-1] + 1) if len(covered) else (0, 0)
+        for first in range(lo, hi, LANE_CHUNK_BUCKETS):
+            last = min(first + LANE_CHUNK_BUCKETS, hi)
+            block = store.read(int(edges[first]), int(edges[last]))
+            offsets = np.minimum(edges[first:last] - edges[first], len(block) - 1)
+            mins[first:last, 0] = np.minimum.reduceat(block.min(axis=1), offsets)
+            maxs[first:last, 0] = np.maximum.reduceat(block.max(axis=1), offsets)
+
+        self.mins = np.hstack([self.mins, mins])
+        self.maxs = np.hstack([self.maxs, maxs])
+        return self.mins.shape[1] - 1
+
+    @property
+    def lanes(self) -> int:
+        return self.mins.shape[1]
+
+    def curve(
+        self,
+        channel: Optional[int] = None,
+        stop: Optional[int] = None,
+        start: int = 0,
+        stride: int = 1,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return (time, amplitude) arrays tracing min and max of each bucket
+        in [start, stop), merging every `stride` buckets into one.
+
+        Without `channel` the envelope spans all channels of the track.
+        Buckets without samples are NaN.
+        """
+        stop = self.filled_buckets() if stop is None else min(stop, self.buckets)
+        start = min(max(start, 0), stop)
+        if channel is None:
+            mins = self.mins[start:stop, : self.channels].min(axis=1)
+            maxs = self.maxs[start:stop, : self.channels].max(axis=1)
+        else:
+            mins = self.mins[start:stop, channel]
+            maxs = self.maxs[start:stop, channel]
+        if stride > 1 and len(mins):
+            groups = np.arange(0, len(mins), stride)
+            mins = np.minimum.reduceat(mins, groups)
+            maxs = np.maximum.reduceat(maxs, groups)
+
+        count = len(mins)
+        y = np.empty(2 * count, dtype=np.float32)
+        y[0::2] = mins
+        y[1::2] = maxs
+        # Empty buckets hold +-inf; NaN leaves a gap in the plotted curve
+        y[~np.isfinite(y)] = np.nan
+        x = np.repeat(start + stride * np.arange(count, dtype=np.float64), 2)
+        x *= self.samples_per_peak / self.sample_rate
+        return x, y
+
+
+class TrackDecoder:
+    """
+    Decodes a source into a SampleStore and its PeakOverview.
+
+    `blocks` does the work one block per step, so callers can show partial
+    results, report progress or stop between blocks.
+    """
+
+    def __init__(self, source: AudioSource):
+        self.source = source
+        self.store = SampleStore.allocate(
+            source.frames, source.channels, source.sample_rate
+        )
+        self.peaks = PeakOverview(source.frames, source.channels, source.sample_rate)
+
+    def blocks(self, block_size: int) -> Iterator[int]:
+        """
+        Decode block by block, yielding the number of frames filled. The
+        store and peaks are sized from the length the source announced:
+        frames past it are dropped, and the store is trimmed when the source
+        ends early.
+        """
+        frames = self.store.frames
+        end = 0
+        for start, block in self.source.iter_blocks(block_size, dtype="int16"):
+            if start >= frames:
+                break
+            end = min(start + len(block), frames)
+            self.store.write(start, block[: end - start])
+            self.peaks.update(start, self.store.read(start, end))
+            yield end
+        if end < frames:
+            self.store.resize(end)
+
+
+class SpectrogramTiles:
+    """
+    Lazily computed, LRU-cached STFT tiles of an AudioSource.
+
+    Tile (level, index) holds TILE_COLUMNS magnitude frames in dB taken
+    every `hop * 2**level` samples, so zooming out switches to a sparser
+    level instead of computing more columns, and every tile costs the same.
+    """
+
+    def __init__(
+        self,
+        source: AudioSource,
+        n_fft: int = SPECTROGRAM_FFT_SIZE,
+        hop: int = SPECTROGRAM_HOP,
+        max_tiles: int = SPECTROGRAM_CACHE_TILES,
+    ):
+        self.source = source
+        self.n_fft = n_fft
+        self.hop = hop
+        self.max_tiles = max_tiles
+        self.window = np.hanning(n_fft).astype(np.float32)
+        self._tiles: "OrderedDict[Tuple[int, int], np.ndarray]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def bins(self) -> int:
+        return self.n_fft // 2 + 1
+
+    def tile_span(self, level: int) -> int:
+        """Number of input samples covered by one tile at `level`."""
+        return TILE_COLUMNS * (self.hop << level)
+
+    def tile_count(self, level: int) -> int:
+        return max(1, -(-self.source.frames // self.tile_span(level)))
+
+    def level_for(self, samples_per_pixel: float) -> int:
+        """Coarsest level whose column spacing is finer than a pixel."""
+        level = 0
+        while (self.hop << (level + 1)) <= samples_per_pixel and level < 16:
+            level += 1
+        return level
+
+    def tile(self, level: int, index: int) -> np.ndarray:
+        key = (level, index)
+        if key in self._tiles:
+            self.hits += 1
+            self._tiles.move_to_end(key)
+            return self._tiles[key]
+
+        self.misses += 1
+        tile = self._compute(level, index)
+        self._tiles[key] = tile
+        if len(self._tiles) > self.max_tiles:
+            self._tiles.popitem(last=False)
+        return tile
+
+    def _compute(self, level: int, index: int) -> np.ndarray:
+        hop = self.hop << level
+        # Frames are centred on their hop position
+        first = index * self.tile_span(level) - self.n_fft // 2
+        starts = first + hop * np.arange(TILE_COLUMNS)
+
+        if hop < self.n_fft:
+            # Windows overlap: one read of the tile's span covers them all
+            # with fewer samples than reading each window
+            block = self._read_mono(first, int(starts[-1]) + self.n_fft - first)
+            frames = sliding_window_view(block, self.n_fft)[starts - first]
+        else:
+            # Sparse levels: read only the windows, not the gaps between them
+            frames = np.stack(
+                [self._read_mono(int(start), self.n_fft) for start in starts]
+            )
+
+        spectrum = np.abs(np.fft.rfft(frames * self.window, axis=1))
+        return (20.0 * np.log10(spectrum + 1e-9)).astype(np.float32)
+
+    def _read_mono(self, start: int, frames: int) -> np.ndarray:
+        """Mono samples [start, start + frames), zero outside the source."""
+        block = np.zeros(frames, dtype=np.float32)
+        lo = max(start, 0)
+        hi = min(start + frames, self.source.frames)
+        if hi > lo:
+            samples = self.source.read(lo, hi - lo)
+            block[lo - start : lo - start + len(samples)] = samples.mean(axis=1)
+        return block
+
+
+class SpectrogramView(QObject):
+    """
+    Renders the tiles intersecting a PlotItem's visible range as ImageItems.
+
+    Only visible tiles are requested; tiles scrolled back into view come from
+    the LRU cache of SpectrogramTiles.
+    """
+
+    def __init__(
+        self,
+        plot_item: pg.PlotItem,
+        max_tiles: int = SPECTROGRAM_CACHE_TILES,
+        parent: Optional[QObject] = None,
+    ):
+        super().__init__(parent)
+        self.plot_item = plot_item
+        self.max_tiles = max_tiles
+        self.tiles: Optional[SpectrogramTiles] = None
+        self._items: Dict[Tuple[int, int], pg.ImageItem] = {}
+        self._lut = pg.colormap.get("viridis").getLookupTable(nPts=256)
+        self.plot_item.setLabel("left", "Frequency (Hz)")
+        self.plot_item.sigXRangeChanged.connect(self.refresh)
+
+    def set_source(self, source: AudioSource) -> None:
+        self.clear()
+        self.tiles = SpectrogramTiles(source, max_tiles=self.max_tiles)
+        self.plot_item.setYRange(0, source.sample_rate / 2, padding=0)
+        self.refresh()
+
+    def clear(self) -> None:
+        for item in self._items.values():
+            self.plot_item.removeItem(item)
+        self._items.clear()
+        self.tiles = None
+
+    def refresh(self, *args) -> None:
+        if self.tiles is None:
+            return
+        source = self.tiles.source
+        rate = source.sample_rate
+        (x0, x1), _ = self.plot_item.viewRange()
+        width = max(self.plot_item.getViewBox().width(), 1.0)
+        start = max(x0, 0.0) * rate
+        stop = min(x1 * rate, source.frames)
+        if stop <= start:
+            return
+
+        level = self.tiles.level_for((stop - start) / width)
+        span = self.tiles.tile_span(level)
+        first = int(start // span)
+        last = min(int(stop // span), self.tiles.tile_count(level) - 1)
+        visible = {(level, index) for index in range(first, last + 1)}
+
+        for key in list(self._items):
+            if key not in visible:
+                self.plot_item.removeItem(self._items.pop(key))
+
+        for key in sorted(visible - self._items.keys()):
+            image = self.tiles.tile(*key)
+            item = pg.ImageItem(image, levels=(-60, 60), lut=self._lut)
+            item.setRect(
+                QRectF(key[1] * span / rate, 0.0, span / rate, rate / 2)
+            )
+            item.setZValue(-10)
+            self.plot_item.addItem(item)
+            self._items[key] = item
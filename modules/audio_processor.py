@@ -1,36 +1,106 @@
 # utils/audio_processor.py
-import ffmpeg
+import os
+
 import soundfile as sf
 from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot
 
+from modules.audio.converter import ConvertingSource
+from modules.audio.loader import decode, open_source
+
+TARGET_SAMPLE_RATE = 44100
+MODEL_CHANNELS = 2
+TARGET_SUBTYPE = "PCM_16"
+
+
+def converted_path(input_path: str) -> str:
+    """Name of the converted copy; never the input itself."""
+    return f"{os.path.splitext(input_path)[0]}.{TARGET_SAMPLE_RATE}.wav"
+
+
+def is_target_format(input_path: str) -> bool:
+    try:
+        info = sf.info(input_path)
+    except RuntimeError:
+        return False
+    return (
+        info.format == "WAV"
+        and info.subtype == TARGET_SUBTYPE
+        and info.samplerate == TARGET_SAMPLE_RATE
+    )
+
 
 class AudioProcessor(QObject):
     conversion_finished = pyqtSignal(str, object)
+    audio_ready = pyqtSignal(str, object)
     progress_updated = pyqtSignal(int)
     error_occurred = pyqtSignal(str)
 
     @pyqtSlot(str)
     def convert_to_wav(self, input_path: str) -> None:
         try:
-            output_path = input_path.rsplit(".", 1)[0] + ".wav"
-
-            # FFmpeg conversion
-            (
-                ffmpeg.input(input_path)
-                .output(output_path, acodec="pcm_s16le", ar="44100")
-                .run(quiet=True)
-            )
+            if is_target_format(input_path):
+                # Already what the models expect; leave the file alone
+                output_path = input_path
+            else:
+                output_path = converted_path(input_path)
+                self._convert(input_path, output_path)
+            self.progress_updated.emit(100)
 
             # Metadata extraction
-            with sf.SoundFile(output_path) as f:
+            with open_source(output_path) as source:
                 metadata = {
-                    "duration": len(f) / f.samplerate,
-                    "sample_rate": f.samplerate,
-                    "channels": f.channels,
-                    "samples": len(f),
+                    "duration": source.duration,
+                    "sample_rate": source.sample_rate,
+                    "channels": source.channels,
+                    "samples": source.frames,
                 }
 
             self.conversion_finished.emit(output_path, metadata)
 
         except Exception as e:
             self.error_occurred.emit(str(e))
+
+    def _convert(self, input_path: str, output_path: str) -> None:
+        partial_path = output_path + ".part"
+        try:
+            # In-process decode and resample; ffmpeg is only spawned by the
+            # loader for formats libsndfile cannot read
+            with open_source(input_path) as source:
+                converted = ConvertingSource(
+                    source, TARGET_SAMPLE_RATE, source.channels
+                )
+                with sf.SoundFile(
+                    partial_path,
+                    "w",
+                    TARGET_SAMPLE_RATE,
+                    converted.channels,
+                    subtype=TARGET_SUBTYPE,
+                    format="WAV",
+                ) as out:
+                    for position, block in converted.iter_blocks():
+                        out.write(block)
+                        self.progress_updated.emit(
+                            min(100, int(100 * position / max(converted.frames, 1)))
+                        )
+            os.replace(partial_path, output_path)
+        finally:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+
+    @pyqtSlot(str)
+    def load_for_model(
+        self,
+        input_path: str,
+        sample_rate: int = TARGET_SAMPLE_RATE,
+        channels: int = MODEL_CHANNELS,
+    ) -> None:
+        """
+        Decode `input_path` straight into a SampleStore at the model's rate
+        and channel layout, without a temporary file.
+        """
+        try:
+            with open_source(input_path) as source:
+                store = decode(ConvertingSource(source, sample_rate, channels))
+            self.audio_ready.emit(input_path, store)
+        except Exception as e:
+            self.error_occurred.emit(str(e))
@@ -1,40 +1,242 @@
 # utils/canvas_manager.py
-from typing import Any, Dict
+import threading
+from typing import Any, Dict, List, Optional, Tuple
 
-import numpy as np
 import pyqtgraph as pg
-import soundfile as sf
-from PyQt6.QtCore import QObject, pyqtSignal
+from PyQt6.QtCore import QObject, QThread, pyqtSignal, pyqtSlot
+
+from modules.audio.loader import open_source
+from modules.audio.store import SampleStore
+from modules.audio.summary import RegionStats, SummaryIndex
+from modules.audio.visualization import PeakOverview, TrackDecoder
+
+DECODE_BLOCK_SIZE = 65536
+UPDATE_EVERY_BLOCKS = 4
+# Vertical distance between lane centres; each lane spans amplitude +-1
+LANE_SPACING = 2.2
+
+
+class DecodeWorker(QObject):
+    """Reads a file block by block, filling a SampleStore and its peaks."""
+
+    decode_started = pyqtSignal(int, object, object)
+    blocks_decoded = pyqtSignal(int, int)
+    summary_ready = pyqtSignal(int, object)
+    finished = pyqtSignal(int)
+    error = pyqtSignal(str)
+
+    def __init__(
+        self,
+        token: int,
+        file_path: str,
+        block_size: int = DECODE_BLOCK_SIZE,
+        update_every: int = UPDATE_EVERY_BLOCKS,
+    ):
+        super().__init__()
+        self.token = token
+        self.file_path = file_path
+        self.block_size = block_size
+        self.update_every = update_every
+        self._cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def is_cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    @pyqtSlot()
+    def run(self):
+        try:
+            with open_source(self.file_path) as source:
+                decoder = TrackDecoder(source)
+                self.decode_started.emit(self.token, decoder.store, decoder.peaks)
+
+                end = 0
+                for index, end in enumerate(decoder.blocks(self.block_size), 1):
+                    if self._cancelled.is_set():
+                        return
+                    if index % self.update_every == 0:
+                        self.blocks_decoded.emit(self.token, end)
+
+                self.blocks_decoded.emit(self.token, end)
+                self.summary_ready.emit(self.token, SummaryIndex(decoder.store))
+        except Exception as e:
+            self.error.emit(str(e))
+        finally:
+            self.finished.emit(self.token)
 
 
 class CanvasManager(QObject):
     selection_changed = pyqtSignal(float, float)
+    region_stats_changed = pyqtSignal(object)
+    loading_finished = pyqtSignal()
+    error_occurred = pyqtSignal(str)
 
     def __init__(self, settings, parent=None):
         super().__init__()
         self.plot_widget = pg.PlotWidget()
         self.region = pg.LinearRegionItem()
         self.settings = settings
-        self.data = None
+        self.store: Optional[SampleStore] = None
+        self.peaks: Optional[PeakOverview] = None
+        self.summary: Optional[SummaryIndex] = None
+        # (label, peak column) per lane, top to bottom
+        self.lanes: List[Tuple[str, int]] = []
+        self._curves: List[pg.PlotDataItem] = []
         self.sample_rate = None
         self.parent = parent
+        self._load_token = 0
+        self._decoders: Dict[int, DecodeWorker] = {}
         self._init_plot()
 
     def _init_plot(self):
-        self.plot_widget.setLabel("left", "Amplitude")
         self.plot_widget.setLabel("bottom", "Time (s)")
+        self.plot_widget.setYRange(-1, 1)
         self.plot_widget.addItem(self.region)
         self.region.sigRegionChanged.connect(self._handle_region_change)
+        self.plot_widget.getViewBox().sigRangeChanged.connect(self._redraw)
 
     def load_audio(self, file_path: str, metadata: Dict[str, Any]):
-        with sf.SoundFile(file_path) as f:
-            self.data = f.read(dtype="float32")
-            self.sample_rate = f.samplerate
+        """
+        Start decoding `file_path` in the background.
+
+        The waveform is drawn from the peak overview and fills in left to
+        right as blocks are decoded.
+        """
+        self.cancel_loading()
+        self._set_lanes([])
+
+        self._load_token += 1
+        thread = QThread(self)
+        block_size = DECODE_BLOCK_SIZE
+        if self.settings is not None:
+            block_size = self.settings.get_performance("decode_block_size")
+        worker = DecodeWorker(self._load_token, file_path, block_size)
+        worker.moveToThread(thread)
+
+        thread.started.connect(worker.run)
+        worker.decode_started.connect(self._on_decode_started)
+        worker.blocks_decoded.connect(self._on_blocks_decoded)
+        worker.summary_ready.connect(self._on_summary_ready)
+        worker.error.connect(self.error_occurred)
+        worker.finished.connect(self._on_decode_finished)
+        worker.finished.connect(thread.quit)
+        worker.finished.connect(worker.deleteLater)
+        thread.finished.connect(thread.deleteLater)
+
+        self._decoders[self._load_token] = worker
+        thread.start()
+
+    def load_decoded(
+        self, store: SampleStore, peaks: PeakOverview, summary: SummaryIndex
+    ) -> None:
+        """Show a track that was already decoded, e.g. by the Prefetcher."""
+        self.cancel_loading()
+        self._load_token += 1
+        self._on_decode_started(self._load_token, store, peaks)
+        self._on_summary_ready(self._load_token, summary)
+        self.loading_finished.emit()
+
+    def cancel_loading(self) -> None:
+        # The worker stops at its next block and quits its own thread;
+        # late signals from it carry a stale token and are ignored.
+        worker = self._decoders.get(self._load_token)
+        if worker is not None:
+            worker.cancel()
+
+    def _on_decode_started(
+        self, token: int, store: SampleStore, peaks: PeakOverview
+    ):
+        if token != self._load_token:
+            return
+        self.store = store
+        self.peaks = peaks
+        self.summary = None
+        self.sample_rate = store.sample_rate
+        self._set_lanes([(f"Ch {i + 1}", i) for i in range(store.channels)])
+        self.plot_widget.setXRange(0, store.duration, padding=0)
+        self.region.setRegion([0, store.duration])
+
+    def _on_blocks_decoded(self, token: int, frames: int):
+        if token != self._load_token:
+            return
+        self._redraw()
+
+    def _on_summary_ready(self, token: int, summary: SummaryIndex):
+        if token != self._load_token:
+            return
+        self.summary = summary
+        self._handle_region_change()
+
+    def _on_decode_finished(self, token: int):
+        worker = self._decoders.pop(token, None)
+        if token == self._load_token and not worker.is_cancelled():
+            self.loading_finished.emit()
+
+    def add_stem_lanes(
+        self, stems: Dict[str, SampleStore], start: float = 0.0
+    ) -> None:
+        """
+        Add one lane per separated stem below the track's channel lanes.
+
+        Stem envelopes are appended to the track's peak buffer, so all lanes
+        share its time buckets; `start` is the track time in seconds where
+        the stems begin, e.g. the start of a separated range. Call once the
+        track has finished loading.
+        """
+        if self.peaks is None or self._decoders:
+            raise RuntimeError("Track is still loading.")
+        lanes = list(self.lanes)
+        for name, store in stems.items():
+            lanes.append((name.capitalize(), self.peaks.add_lane(store, start)))
+        self._set_lanes(lanes)
+
+    def _set_lanes(self, lanes: List[Tuple[str, int]]) -> None:
+        for curve in self._curves:
+            self.plot_widget.removeItem(curve)
+        self.lanes = lanes
+        self._curves = [self.plot_widget.plot() for _ in lanes]
+
+        ticks = [(-LANE_SPACING * row, label) for row, (label, _) in enumerate(lanes)]
+        self.plot_widget.getAxis("left").setTicks([ticks])
+        bottom = -LANE_SPACING * max(len(lanes) - 1, 0)
+        self.plot_widget.setYRange(bottom - 1, 1, padding=0.02)
+        self._redraw()
+
+    def _redraw(self, *args) -> None:
+        """
+        Redraw only the lanes inside the visible y range, each from the
+        visible slice of the shared peak buffer merged down to about one
+        bucket per pixel, so the cost does not grow with lane count or zoom.
+        """
+        if self.peaks is None or not self.lanes:
+            return
+        view = self.plot_widget.getViewBox()
+        (x0, x1), (y0, y1) = view.viewRange()
+        bucket_seconds = self.peaks.samples_per_peak / self.peaks.sample_rate
+        first = max(int(x0 / bucket_seconds), 0)
+        last = min(int(x1 / bucket_seconds) + 1, self.peaks.filled_buckets())
+        stride = max(1, (last - first) // max(int(view.width()), 1))
+
+        for row, ((_, column), curve) in enumerate(zip(self.lanes, self._curves)):
+            offset = -LANE_SPACING * row
+            if offset + 1 < y0 or offset - 1 > y1 or last <= first:
+                curve.setVisible(False)
+                continue
+            x, y = self.peaks.curve(column, stop=last, start=first, stride=stride)
+            curve.setData(x, y + offset, connect="finite")
+            curve.setVisible(True)
 
-        time = np.arange(len(self.data)) / self.sample_rate
-        self.plot_widget.plot(time, self.data, clear=True)
-        self.region.setRegion([0, len(self.data) / self.sample_rate])
+    def region_stats(self, start: float, end: float) -> Optional[RegionStats]:
+        """Return RMS, peak, DC offset and loudness of a region in seconds."""
+        if self.summary is None:
+            return None
+        return self.summary.stats(start, end)
 
     def _handle_region_change(self):
         start, end = self.region.getRegion()
         self.selection_changed.emit(start, end)
+        stats = self.region_stats(start, end)
+        if stats is not None:
+            self.region_stats_changed.emit(stats)
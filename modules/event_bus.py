@@ -0,0 +1,160 @@
+# modules/event_bus.py
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from PyQt6.QtCore import QObject, Qt, QTimer, pyqtSignal, pyqtSlot
+
+FRAME_INTERVAL_MS = 16
+
+# Coalescing policies
+LATEST = "latest"  # deliver only the last update of the frame
+PROGRESS = "progress"  # last value per key, e.g. per file or job
+COLLECT = "collect"  # deliver every update of the frame as one list
+
+
+@dataclass
+class TopicMetrics:
+    """
+    Counters of one topic. `queue_depth` is the number of updates waiting
+    for the next frame; `dropped` counts updates superseded before delivery.
+    """
+
+    posted: int = 0
+    delivered: int = 0
+    dropped: int = 0
+    queue_depth: int = 0
+    peak_queue_depth: int = 0
+    flushes: int = 0
+
+
+class _Topic:
+    def __init__(self, policy: str, key_index: Optional[int]):
+        self.policy = policy
+        self.key_index = key_index
+        self.pending: Any = None
+        self.subscribers: List[Callable[[Any], None]] = []
+        self.metrics = TopicMetrics()
+        self._frame_dropped = 0
+
+    def post(self, value: Any) -> None:
+        metrics = self.metrics
+        metrics.posted += 1
+        metrics.queue_depth += 1
+        metrics.peak_queue_depth = max(metrics.peak_queue_depth, metrics.queue_depth)
+        if self.policy == COLLECT:
+            if self.pending is None:
+                self.pending = []
+            self.pending.append(value)
+        elif self.policy == PROGRESS and self.key_index is not None:
+            if self.pending is None:
+                self.pending = {}
+            key = value[self.key_index]
+            if key in self.pending:
+                self._drop()
+            self.pending[key] = value
+        else:
+            if metrics.queue_depth > 1:
+                self._drop()
+            self.pending = value
+
+    def _drop(self) -> None:
+        self.metrics.dropped += 1
+        self._frame_dropped += 1
+
+    def take(self) -> Any:
+        """Return the coalesced payload and start a new frame."""
+        metrics = self.metrics
+        metrics.delivered += metrics.queue_depth - self._frame_dropped
+        metrics.flushes += 1
+        metrics.queue_depth = 0
+        self._frame_dropped = 0
+        value, self.pending = self.pending, None
+        return value
+
+
+class EventBus(QObject):
+    """
+    Coalesces high-frequency signals into at most one delivery per topic
+    per frame.
+
+    Sources are connected directly, so a worker thread emitting thousands
+    of updates only touches a locked dict; the GUI thread is woken once per
+    frame and hands each subscriber the coalesced payload: the last value
+    (LATEST), the last value per key (PROGRESS, a dict when keyed), or a
+    list of every update (COLLECT). Updates are args tuples, unwrapped for
+    single-argument signals.
+    """
+
+    _wake = pyqtSignal()
+
+    def __init__(
+        self, parent: Optional[QObject] = None, interval_ms: int = FRAME_INTERVAL_MS
+    ):
+        super().__init__(parent)
+        self.interval_ms = interval_ms
+        self._topics: Dict[str, _Topic] = {}
+        self._lock = threading.Lock()
+        self._scheduled = False
+        self._last_flush = 0.0
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.flush)
+        self._wake.connect(self._schedule)
+
+    def register(
+        self, topic: str, policy: str = LATEST, key_index: Optional[int] = None
+    ) -> None:
+        if policy not in (LATEST, PROGRESS, COLLECT):
+            raise ValueError(f"Unknown coalescing policy: {policy}")
+        with self._lock:
+            self._topics[topic] = _Topic(policy, key_index)
+
+    def add_source(self, signal, topic: str) -> None:
+        """Route every emission of `signal` into `topic`."""
+        signal.connect(
+            lambda *args: self.post(topic, *args), Qt.ConnectionType.DirectConnection
+        )
+
+    def subscribe(self, topic: str, callback: Callable[[Any], None]) -> None:
+        with self._lock:
+            self._topics[topic].subscribers.append(callback)
+
+    def post(self, topic: str, *args: Any) -> None:
+        """Queue an update; safe to call from any thread."""
+        value = args[0] if len(args) == 1 else args
+        with self._lock:
+            self._topics[topic].post(value)
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self._wake.emit()
+
+    @pyqtSlot()
+    def _schedule(self) -> None:
+        elapsed = (time.monotonic() - self._last_flush) * 1000.0
+        self._timer.start(max(0, int(self.interval_ms - elapsed)))
+
+    @pyqtSlot()
+    def flush(self) -> None:
+        """Deliver everything pending to the subscribers."""
+        with self._lock:
+            self._scheduled = False
+            batches = []
+            for topic in self._topics.values():
+                if topic.metrics.queue_depth:
+                    batches.append((topic, topic.take()))
+        self._last_flush = time.monotonic()
+
+        for topic, payload in batches:
+            for callback in list(topic.subscribers):
+                callback(payload)
+
+    def metrics(self) -> Dict[str, TopicMetrics]:
+        """Snapshot of per-topic counters."""
+        with self._lock:
+            return {
+                name: TopicMetrics(**vars(topic.metrics))
+                for name, topic in self._topics.items()
+            }
@@ -1,40 +1,48 @@
 # utils/file_processor.py
 import os
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 from mutagen import File
 from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot
 
+from modules.audio.fingerprint import FingerprintIndex, fingerprint
+from modules.audio.loader import open_source
+
 SUPPORTED_FORMATS = {"mp3", "flac", "wav"}
 
 
 class FileProcessor(QObject):
     progress_updated = pyqtSignal(int, str)
     processing_finished = pyqtSignal(str, object)
+    # (path, message) of a file that could not be processed
+    processing_failed = pyqtSignal(str, str)
     error_occurred = pyqtSignal(str)
 
+    def __init__(self, fingerprints: Optional[FingerprintIndex] = None):
+        super().__init__()
+        self.fingerprints = fingerprints
+
     @pyqtSlot(list)
     def process_files(self, files: List[str]) -> None:
-        try:
-            for file_path in files:
-                if not self._validate_file(file_path):
-                    continue
-
+        # One bad file must not keep the rest of the batch from being indexed
+        for file_path in files:
+            try:
+                self._validate_file(file_path)
                 metadata = self._extract_metadata(file_path)
-                self.processing_finished.emit(file_path, metadata)
+                if self.fingerprints is not None:
+                    metadata.update(self._fingerprint(file_path))
+            except Exception as e:
+                self.error_occurred.emit(str(e))
+                self.processing_failed.emit(file_path, str(e))
+                continue
+            self.processing_finished.emit(file_path, metadata)
 
-        except Exception as e:
-            self.error_occurred.emit(str(e))
-
-    def _validate_file(self, file_path: str) -> bool:
+    def _validate_file(self, file_path: str) -> None:
         ext = os.path.splitext(file_path)[1][1:].lower()
         if ext not in SUPPORTED_FORMATS:
-            self.error_occurred.emit(f"Unsupported file format: {ext}")
-            return False
-        return True
+            raise ValueError(f"Unsupported file format: {ext}")
 
     def _extract_metadata(self, file_path: str) -> Dict[str, Any]:
-        metadata = {}
         try:
             audio_file = File(file_path)
             metadata = {
@@ -44,6 +52,32 @@ class FileProcessor(QObject):
                 "bitrate": getattr(audio_file.info, "bitrate", 0),
                 "tags": dict(audio_file.tags) if audio_file.tags else {},
             }
+            # Header-only open; nothing is decoded here
+            with open_source(file_path) as source:
+                metadata["sample_rate"] = source.sample_rate
+                metadata["channels"] = source.channels
+                metadata["samples"] = source.frames
         except Exception as e:
-            self.error_occurred.emit(f"Metadata error: {str(e)}")
+            raise RuntimeError(f"Metadata error: {str(e)}") from e
         return metadata
+
+    def _fingerprint(self, file_path: str) -> Dict[str, Any]:
+        """
+        Index the file's landmark hashes and report an earlier scanned copy
+        of the same recording as "fingerprint_match".
+        """
+        result = {}
+        try:
+            mtime = os.path.getmtime(file_path)
+            known = self.fingerprints.find(file_path)
+            if known is not None and known["mtime"] == mtime:
+                return result
+            with open_source(file_path) as source:
+                landmarks = fingerprint(source)
+            match = self.fingerprints.match(landmarks, exclude=file_path)
+            self.fingerprints.add(file_path, landmarks, mtime)
+            if match is not None:
+                result["fingerprint_match"] = match
+        except Exception as e:
+            raise RuntimeError(f"Fingerprint error: {str(e)}") from e
+        return result
@@ -0,0 +1,136 @@
+# modules/ingestion.py
+import os
+import threading
+from typing import Iterator, List, Optional, Set
+
+from PyQt6.QtCore import QObject, QThread, pyqtSignal, pyqtSlot
+
+DEFAULT_BATCH_SIZE = 64
+
+
+def normalize_path(path: str) -> str:
+    """Return the key used to de-duplicate dropped paths."""
+    return os.path.normcase(os.path.abspath(path))
+
+
+class _IngestionWorker(QObject):
+    """Expands dropped paths on the ingestion thread and emits batches."""
+
+    batch_ready = pyqtSignal(list)
+    ingestion_finished = pyqtSignal(int)
+    error_occurred = pyqtSignal(str)
+
+    def __init__(self, queue: "DropIngestionQueue"):
+        super().__init__()
+        self.queue = queue
+
+    @pyqtSlot(list)
+    def ingest(self, paths: List[str]) -> None:
+        accepted = 0
+        batch: List[str] = []
+        try:
+            for root in paths:
+                for file_path in self._expand(root):
+                    if self.queue.is_stopping():
+                        return
+                    if not self.queue.claim(file_path):
+                        continue
+                    batch.append(file_path)
+                    accepted += 1
+                    if len(batch) >= self.queue.batch_size:
+                        self.batch_ready.emit(batch)
+                        batch = []
+
+            if batch:
+                self.batch_ready.emit(batch)
+        except Exception as e:
+            self.error_occurred.emit(str(e))
+        finally:
+            self.ingestion_finished.emit(accepted)
+
+    def _expand(self, root: str) -> Iterator[str]:
+        if os.path.isdir(root):
+            for dir_path, dir_names, file_names in os.walk(root):
+                dir_names.sort()
+                for name in sorted(file_names):
+                    if self.queue.accepts(name):
+                        yield os.path.join(dir_path, name)
+        elif self.queue.accepts(root) and os.path.isfile(root):
+            yield root
+
+
+class DropIngestionQueue(QObject):
+    """
+    Background queue that turns dropped files and folders into batches.
+
+    Folders are walked on a dedicated thread and every path is emitted at most
+    once: paths that are already queued or have been marked as indexed are
+    skipped, so dropping the same selection twice does no repeated work.
+    Paths released after a failure are ingested again by the next drop.
+    """
+
+    batch_ready = pyqtSignal(list)
+    ingestion_finished = pyqtSignal(int)
+    error_occurred = pyqtSignal(str)
+    _ingest_requested = pyqtSignal(list)
+
+    def __init__(
+        self,
+        accept_extensions: List[str],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        parent: Optional[QObject] = None,
+    ):
+        super().__init__(parent)
+        self.accept_extensions = tuple(ext.lower() for ext in accept_extensions)
+        self.batch_size = max(1, batch_size)
+        self._seen: Set[str] = set()
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+
+        self._thread = QThread()
+        self._worker = _IngestionWorker(self)
+        self._worker.moveToThread(self._thread)
+
+        self._ingest_requested.connect(self._worker.ingest)
+        self._worker.batch_ready.connect(self.batch_ready)
+        self._worker.ingestion_finished.connect(self.ingestion_finished)
+        self._worker.error_occurred.connect(self.error_occurred)
+        self._thread.finished.connect(self._worker.deleteLater)
+
+        self._thread.start()
+
+    def enqueue(self, paths: List[str]) -> None:
+        """Queue files or folders for ingestion without blocking the caller."""
+        if paths:
+            self._ingest_requested.emit(list(paths))
+
+    def accepts(self, file_path: str) -> bool:
+        return file_path.lower().endswith(self.accept_extensions)
+
+    def claim(self, file_path: str) -> bool:
+        """Mark a path as queued; returns False if it was already known."""
+        key = normalize_path(file_path)
+        with self._lock:
+            if key in self._seen:
+                return False
+            self._seen.add(key)
+            return True
+
+    @pyqtSlot(str, object)
+    def mark_indexed(self, file_path: str, metadata: object = None) -> None:
+        with self._lock:
+            self._seen.add(normalize_path(file_path))
+
+    @pyqtSlot(str)
+    def release(self, file_path: str) -> None:
+        """Forget a path, e.g. one that failed, so a later drop ingests it again."""
+        with self._lock:
+            self._seen.discard(normalize_path(file_path))
+
+    def is_stopping(self) -> bool:
+        return self._stopping.is_set()
+
+    def shutdown(self) -> None:
+        self._stopping.set()
+        self._thread.quit()
+        self._thread.wait()
@@ -0,0 +1,119 @@
+# modules/interval_cache.py
+import bisect
+import threading
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+class IntervalCache:
+    """
+    Non-overlapping segments of a per-track result, keyed by frame range.
+
+    Arrays are stored with time on the last axis. `missing` reports which
+    parts of a range still have to be computed and `splice` stitches the
+    cached pieces back into one contiguous array.
+    """
+
+    def __init__(self, dtype: np.dtype = np.float16):
+        self.dtype = dtype
+        self._starts: List[int] = []
+        self._segments: List[Tuple[int, int, np.ndarray]] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._segments)
+
+    @property
+    def nbytes(self) -> int:
+        with self._lock:
+            return sum(segment.nbytes for _, _, segment in self._segments)
+
+    def missing(self, start: int, stop: int) -> List[Tuple[int, int]]:
+        """Return the sub-ranges of [start, stop) that are not cached yet."""
+        gaps = []
+        cursor = start
+        with self._lock:
+            for seg_start, seg_stop, _ in self._overlapping(start, stop):
+                if seg_start > cursor:
+                    gaps.append((cursor, seg_start))
+                cursor = max(cursor, seg_stop)
+        if cursor < stop:
+            gaps.append((cursor, stop))
+        return gaps
+
+    def insert(self, start: int, data: np.ndarray) -> None:
+        """Cache `data` for frames [start, start + data.shape[-1])."""
+        stop = start + data.shape[-1]
+        data = data.astype(self.dtype, copy=False)
+        with self._lock:
+            # Keep what is already cached and only add the uncovered parts
+            pieces = []
+            cursor = start
+            for seg_start, seg_stop, _ in self._overlapping(start, stop):
+                if seg_start > cursor:
+                    pieces.append((cursor, seg_start))
+                cursor = max(cursor, seg_stop)
+            if cursor < stop:
+                pieces.append((cursor, stop))
+
+            for piece_start, piece_stop in pieces:
+                segment = data[..., piece_start - start : piece_stop - start]
+                index = bisect.bisect(self._starts, piece_start)
+                self._starts.insert(index, piece_start)
+                self._segments.insert(index, (piece_start, piece_stop, segment))
+
+    def splice(self, start: int, stop: int, row: Optional[int] = None) -> np.ndarray:
+        """
+        Return frames [start, stop) as float32; the range must be cached.
+        With `row`, only that index of the leading axis is returned, e.g.
+        one stem, and the others are never copied.
+        """
+        with self._lock:
+            parts = []
+            cursor = start
+            for seg_start, seg_stop, segment in self._overlapping(start, stop):
+                if seg_start > cursor:
+                    raise KeyError(f"Frames {cursor}-{seg_start} are not cached")
+                lo = cursor - seg_start
+                hi = min(stop, seg_stop) - seg_start
+                if row is not None:
+                    segment = segment[row]
+                parts.append(segment[..., lo:hi])
+                cursor = seg_start + hi
+        if cursor < stop:
+            raise KeyError(f"Frames {cursor}-{stop} are not cached")
+        if not parts:
+            raise ValueError("Empty range")
+        # Upcast straight into the result instead of concatenating first
+        out = np.empty(parts[0].shape[:-1] + (stop - start,), dtype=np.float32)
+        position = 0
+        for part in parts:
+            out[..., position : position + part.shape[-1]] = part
+            position += part.shape[-1]
+        return out
+
+    def discard_outside(self, start: int, stop: int) -> None:
+        """Drop the segments that do not overlap [start, stop)."""
+        with self._lock:
+            kept = [
+                segment
+                for segment in self._segments
+                if segment[0] < stop and segment[1] > start
+            ]
+            self._segments = kept
+            self._starts = [segment[0] for segment in kept]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._starts.clear()
+            self._segments.clear()
+
+    def _overlapping(self, start: int, stop: int):
+        index = max(bisect.bisect(self._starts, start) - 1, 0)
+        for segment in self._segments[index:]:
+            seg_start, seg_stop, _ = segment
+            if seg_start >= stop:
+                break
+            if seg_stop > start:
+                yield segment
@@ -0,0 +1,459 @@
+# modules/job_scheduler.py
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import soundfile as sf
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from modules.audio.converter import ConvertingSource
+from modules.audio.fingerprint import (
+    FINGERPRINT_HOP,
+    FINGERPRINT_RATE,
+    FingerprintIndex,
+    fingerprint,
+    refine_offset,
+)
+from modules.audio.loader import MemorySource, decode, open_source
+from modules.audio.store import SampleStore
+from modules.audio_processor import MODEL_CHANNELS, TARGET_SAMPLE_RATE
+from modules.model_manager import (
+    CHUNK_SECONDS,
+    MODEL_CONTEXT_SECONDS,
+    TORCH_BACKEND,
+    separate_segment,
+)
+
+DEFAULT_DATA_DIR = os.path.join(os.path.expanduser("~"), ".dinosampler")
+MAX_CONCURRENT_JOBS = 1
+# Stems are reused only if they cover the new input to within this margin
+REUSE_TOLERANCE_SECONDS = 0.5
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    input_path TEXT NOT NULL,
+    model_name TEXT NOT NULL,
+    output_dir TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL,
+    chunks_total INTEGER NOT NULL DEFAULT 0,
+    chunks_done INTEGER NOT NULL DEFAULT 0,
+    chunk_frames INTEGER,
+    sample_rate INTEGER,
+    model_identity TEXT,
+    error TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+)
+"""
+
+# Columns recording how a job's checkpoints were made, added to older journals
+_RESUME_COLUMNS = {
+    "chunk_frames": "INTEGER",
+    "sample_rate": "INTEGER",
+    "model_identity": "TEXT",
+}
+
+
+class JobStore:
+    """SQLite journal of separation jobs; safe to share between threads."""
+
+    def __init__(self, db_path: str):
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(_SCHEMA)
+            columns = {
+                row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")
+            }
+            for name, kind in _RESUME_COLUMNS.items():
+                if name not in columns:
+                    self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {kind}")
+
+    def add(
+        self, input_path: str, model_name: str, output_dir: str, priority: int
+    ) -> int:
+        now = time.time()
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO jobs (input_path, model_name, output_dir, priority,"
+                " status, created, updated) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (input_path, model_name, output_dir, priority, QUEUED, now, now),
+            )
+            return cursor.lastrowid
+
+    def update(self, job_id: int, **fields: Any) -> None:
+        fields["updated"] = time.time()
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id)
+            )
+
+    def get(self, job_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def jobs(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        query = "SELECT * FROM jobs"
+        args = ()
+        if status is not None:
+            query += " WHERE status = ?"
+            args = (status,)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY id", args).fetchall()
+        return [dict(row) for row in rows]
+
+    def claim_next(self) -> Optional[Dict[str, Any]]:
+        """Atomically move the highest-priority queued job to running."""
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY priority DESC, id"
+                " LIMIT 1",
+                (QUEUED,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, updated = ? WHERE id = ?",
+                (RUNNING, time.time(), row["id"]),
+            )
+        job = dict(row)
+        job["status"] = RUNNING
+        return job
+
+    def requeue_interrupted(self) -> int:
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ? WHERE status = ?", (QUEUED, RUNNING)
+            )
+            return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class JobScheduler(QObject):
+    """
+    Persistent, prioritized separation queue with per-chunk checkpoints.
+
+    Jobs are journaled in SQLite and every finished chunk of model output is
+    saved under the checkpoint directory before progress is recorded. After
+    a crash, jobs left running are queued again and resume from the first
+    chunk without a checkpoint.
+
+    With a FingerprintIndex, an input that matches an already separated
+    recording (another format, rate or edit of the same song) gets that
+    recording's stems, aligned and resampled, instead of a model run.
+    """
+
+    job_queued = pyqtSignal(int)
+    job_progress = pyqtSignal(int, int)
+    job_finished = pyqtSignal(int, object)
+    error_occurred = pyqtSignal(str)
+
+    def __init__(
+        self,
+        model_manager,
+        data_dir: str = DEFAULT_DATA_DIR,
+        max_concurrent: int = MAX_CONCURRENT_JOBS,
+        chunk_seconds: float = CHUNK_SECONDS,
+        fingerprints: Optional[FingerprintIndex] = None,
+        parent: Optional[QObject] = None,
+    ):
+        super().__init__(parent)
+        self.model_manager = model_manager
+        self.fingerprints = fingerprints
+        self.max_concurrent = max(1, max_concurrent)
+        self.chunk_seconds = chunk_seconds
+        self.checkpoint_dir = os.path.join(data_dir, "checkpoints")
+        self.store = JobStore(os.path.join(data_dir, "jobs.sqlite"))
+
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.max_concurrent, thread_name_prefix="separation-job"
+        )
+        self._lock = threading.Lock()
+        self._running = 0
+        self._stopping = False
+        self._cancelled = set()
+        self._models = {}
+        self._inputs: Dict[int, SampleStore] = {}
+
+    def resume(self) -> None:
+        """Requeue jobs interrupted by a crash and start dispatching."""
+        self.store.requeue_interrupted()
+        self._dispatch()
+
+    def submit(
+        self,
+        input_path: str,
+        model_name: str,
+        output_dir: str,
+        priority: int = 0,
+        store: Optional[SampleStore] = None,
+    ) -> int:
+        """
+        Queue a job. `store`, the input already decoded at the model's rate
+        and channel layout, saves decoding it again; it is not journaled,
+        so a job resumed after a restart decodes the file.
+        """
+        with self._lock:
+            job_id = self.store.add(input_path, model_name, output_dir, priority)
+            if store is not None:
+                self._inputs[job_id] = store
+        self.job_queued.emit(job_id)
+        self._dispatch()
+        return job_id
+
+    def cancel(self, job_id: int) -> None:
+        with self._lock:
+            self._cancelled.add(job_id)
+            self._inputs.pop(job_id, None)
+        job = self.store.get(job_id)
+        if job is not None and job["status"] == QUEUED:
+            self.store.update(job_id, status=CANCELLED)
+            self._discard_checkpoints(job_id)
+
+    def shutdown(self) -> None:
+        """Stop after the current chunks; unfinished jobs resume next time."""
+        with self._lock:
+            self._stopping = True
+            self._cancelled.update(job["id"] for job in self.store.jobs(RUNNING))
+        self._pool.shutdown(wait=True)
+        self.store.requeue_interrupted()
+        self.store.close()
+
+    def _dispatch(self) -> None:
+        with self._lock:
+            while not self._stopping and self._running < self.max_concurrent:
+                job = self.store.claim_next()
+                if job is None:
+                    break
+                self._running += 1
+                self._pool.submit(self._run_job, job)
+
+    def _run_job(self, job: Dict[str, Any]) -> None:
+        job_id = job["id"]
+        try:
+            outputs = self._separate(job)
+            if outputs is None:
+                # Interrupted by shutdown: keep checkpoints for resume()
+                if not self._stopping:
+                    self.store.update(job_id, status=CANCELLED)
+                    self._discard_checkpoints(job_id)
+            else:
+                self.store.update(job_id, status=DONE)
+                self._discard_checkpoints(job_id)
+                if self.fingerprints is not None:
+                    self.fingerprints.set_stems(
+                        job["input_path"], job["model_identity"], outputs
+                    )
+                self.job_finished.emit(job_id, outputs)
+        except Exception as e:
+            self.store.update(job_id, status=FAILED, error=str(e))
+            self.error_occurred.emit(f"Job {job_id} failed: {e}")
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._cancelled.discard(job_id)
+                self._inputs.pop(job_id, None)
+            self._dispatch()
+
+    def _model(self, model_name: str, identity: str):
+        manager = self.model_manager
+        # A new checkpoint, backend or server connection needs a new model
+        key = (model_name, identity, id(manager.client))
+        with self._lock:
+            if key not in self._models:
+                model = None
+                if manager.get_backend(model_name) == TORCH_BACKEND:
+                    # The weights the user loaded, not freshly initialised ones
+                    model = manager.loaded_model(model_name)
+                if model is None:
+                    model = manager.create_model(model_name)
+                    model.eval()
+                for stale in [k for k in self._models if k[0] == model_name]:
+                    del self._models[stale]
+                self._models[key] = model
+            return self._models[key]
+
+    def _separate(self, job: Dict[str, Any]) -> Optional[Dict[str, str]]:
+        job_id = job["id"]
+        identity = self.model_manager.model_identity(job["model_name"])
+        model = self._model(job["model_name"], identity)
+        # Checkpoints of an earlier run are checked against the stored
+        # identity below; stems are looked up and recorded under the new one
+        previous_identity = job.get("model_identity")
+        job["model_identity"] = identity
+        with self._lock:
+            store = self._inputs.get(job_id)
+        if store is None:
+            with open_source(job["input_path"]) as source:
+                store = decode(
+                    ConvertingSource(source, TARGET_SAMPLE_RATE, MODEL_CHANNELS)
+                )
+
+        outputs = self._reuse_stems(job, store)
+        if outputs is not None:
+            self.job_progress.emit(job_id, 100)
+            return outputs
+
+        # Checkpoints only line up with the chunk layout they were cut with,
+        # so a resumed job keeps the layout of its first run, and chunks from
+        # other weights cannot be mixed in
+        chunk = job.get("chunk_frames")
+        if (
+            not chunk
+            or job.get("sample_rate") != store.sample_rate
+            or previous_identity != identity
+        ):
+            self._discard_checkpoints(job_id)
+            chunk = int(self.chunk_seconds * store.sample_rate)
+        total = max(1, -(-store.frames // chunk))
+        job_dir = os.path.join(self.checkpoint_dir, str(job_id))
+        os.makedirs(job_dir, exist_ok=True)
+        self.store.update(
+            job_id,
+            chunk_frames=chunk,
+            sample_rate=store.sample_rate,
+            model_identity=identity,
+            chunks_total=total,
+        )
+
+        for index in range(total):
+            with self._lock:
+                if job_id in self._cancelled:
+                    return None
+            path = self._chunk_path(job_dir, index)
+            if not os.path.exists(path):
+                start = index * chunk
+                stop = min(start + chunk, store.frames)
+                stems = separate_segment(
+                    model, store, start, stop, MODEL_CONTEXT_SECONDS
+                )
+                _save_atomic(path, stems.astype(np.float16))
+            self.store.update(job_id, chunks_done=index + 1)
+            self.job_progress.emit(job_id, int(100 * (index + 1) / total))
+
+        return self._write_outputs(job, job_dir, total, store.sample_rate)
+
+    def _reuse_stems(
+        self, job: Dict[str, Any], store: SampleStore
+    ) -> Optional[Dict[str, str]]:
+        """
+        Write the stems of a matching, already separated recording aligned
+        to `store`; returns None when there is no usable match.
+        """
+        if self.fingerprints is None:
+            return None
+        path = job["input_path"]
+        landmarks = fingerprint(MemorySource(store))
+        match = self.fingerprints.match(landmarks, exclude=path)
+        if self.fingerprints.find(path) is None:
+            self.fingerprints.add(path, landmarks, os.path.getmtime(path))
+        if match is None:
+            return None
+        # Only stems made by the same weights on the same backend are
+        # interchangeable
+        stem_paths = self.fingerprints.stems(match.track_id, job["model_identity"])
+        if not stem_paths or not all(os.path.exists(p) for p in stem_paths.values()):
+            return None
+        if (
+            match.offset < -REUSE_TOLERANCE_SECONDS
+            or match.offset + store.duration > match.duration + REUSE_TOLERANCE_SECONDS
+        ):
+            return None
+
+        stems = {}
+        for name, stem_path in stem_paths.items():
+            with open_source(stem_path) as source:
+                stems[name] = decode(
+                    ConvertingSource(source, store.sample_rate, source.channels)
+                )
+
+        # The index aligns to one fingerprint hop; cross-correlating the
+        # stem mix with the input makes it sample accurate
+        reference = sum(stem.read().mean(axis=1) for stem in stems.values())
+        search = 2 * FINGERPRINT_HOP * store.sample_rate // FINGERPRINT_RATE
+        offset = refine_offset(
+            reference,
+            store.read().mean(axis=1),
+            int(round(match.offset * store.sample_rate)),
+            search,
+        )
+
+        os.makedirs(job["output_dir"], exist_ok=True)
+        base = os.path.splitext(os.path.basename(path))[0]
+        outputs = {}
+        for name, stem in stems.items():
+            aligned = np.zeros((store.frames, stem.channels), dtype=np.float32)
+            first = max(0, -offset)
+            last = min(store.frames, stem.frames - offset)
+            if last > first:
+                aligned[first:last] = stem.read(first + offset, last + offset)
+            out_path = os.path.join(job["output_dir"], f"{base}_{name}.wav")
+            sf.write(out_path, aligned, store.sample_rate, subtype="PCM_16")
+            outputs[name] = out_path
+        return outputs
+
+    def _write_outputs(self, job, job_dir: str, total: int, sample_rate: int):
+        # Stream checkpoints into one file per stem, one chunk at a time
+        os.makedirs(job["output_dir"], exist_ok=True)
+        base = os.path.splitext(os.path.basename(job["input_path"]))[0]
+        first = np.load(self._chunk_path(job_dir, 0), mmap_mode="r")
+        stems = first.shape[0] if first.ndim == 3 else 1
+
+        outputs = {}
+        files = []
+        try:
+            for stem in range(stems):
+                path = os.path.join(job["output_dir"], f"{base}_stem{stem}.wav")
+                channels = first.shape[-2] if first.ndim >= 2 else 1
+                files.append(
+                    sf.SoundFile(path, "w", sample_rate, channels, subtype="PCM_16")
+                )
+                outputs[f"stem{stem}"] = path
+            for index in range(total):
+                data = np.load(self._chunk_path(job_dir, index), mmap_mode="r")
+                data = data.reshape(stems, -1, data.shape[-1])
+                for stem, out in enumerate(files):
+                    out.write(np.asarray(data[stem].T, dtype=np.float32))
+        finally:
+            for out in files:
+                out.close()
+        return outputs
+
+    def _discard_checkpoints(self, job_id: int) -> None:
+        shutil.rmtree(os.path.join(self.checkpoint_dir, str(job_id)), True)
+
+    @staticmethod
+    def _chunk_path(job_dir: str, index: int) -> str:
+        return os.path.join(job_dir, f"chunk_{index:06d}.npy")
+
+
+def _save_atomic(path: str, data: np.ndarray) -> None:
+    partial = path + ".part"
+    with open(partial, "wb") as f:
+        np.save(f, data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(partial, path)
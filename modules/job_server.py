@@ -0,0 +1,320 @@
+# modules/job_server.py
+"""
+Local separation server.
+
+Keeps models loaded and warm in one process so GUI sessions and scripted
+jobs on the same machine do not each pay for model loading. Clients talk
+to it over a Unix socket (a localhost TCP port on Windows) authenticated
+with a key only readable by the current user; audio travels through shared
+memory, so only small control messages go through the socket.
+
+Run it with ``python -m modules.job_server``.
+"""
+import argparse
+import itertools
+import os
+import secrets
+import sys
+import threading
+from collections import deque
+from multiprocessing import AuthenticationError, resource_tracker
+from multiprocessing.connection import Client, Connection, Listener
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable, Deque, Dict, Optional, Tuple, Union
+
+import numpy as np
+import torch
+
+from models.model_loader import is_mmap_checkpoint, load_into
+from modules.job_scheduler import DEFAULT_DATA_DIR
+
+Address = Union[str, Tuple[str, int]]
+
+SERVER_WORKERS = 1
+DEFAULT_PORT = 47311
+
+
+def default_address(data_dir: str = DEFAULT_DATA_DIR) -> Address:
+    if sys.platform == "win32":
+        return ("127.0.0.1", DEFAULT_PORT)
+    return os.path.join(data_dir, "server.sock")
+
+
+def server_key(data_dir: str = DEFAULT_DATA_DIR, create: bool = False) -> bytes:
+    """Read the shared authentication key, creating it for the server."""
+    path = os.path.join(data_dir, "server.key")
+    if create and not os.path.exists(path):
+        os.makedirs(data_dir, exist_ok=True)
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(secrets.token_bytes(32))
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _share(array: np.ndarray) -> Tuple[SharedMemory, Tuple[str, tuple, str]]:
+    """Copy `array` into a new shared memory block; returns (block, handle)."""
+    array = np.ascontiguousarray(array)
+    shm = SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, array.dtype, buffer=shm.buf)[...] = array
+    return shm, (shm.name, array.shape, array.dtype.str)
+
+
+def _attach(
+    handle: Tuple[str, tuple, str], owner: bool = False
+) -> Tuple[SharedMemory, np.ndarray]:
+    name, shape, dtype = handle
+    shm = SharedMemory(name=name)
+    if not owner:
+        # Another process will unlink the block; keep this process'
+        # resource tracker from unlinking it on exit
+        resource_tracker.unregister(shm._name, "shared_memory")
+    return shm, np.ndarray(shape, np.dtype(dtype), buffer=shm.buf)
+
+
+class SeparationServer:
+    """
+    Serves model runs to local clients from a shared set of warm models.
+
+    Requests are queued per client and workers take them round-robin
+    across clients, so one client submitting many chunks cannot starve
+    the others.
+    """
+
+    def __init__(
+        self,
+        model_factory: Callable[[str], torch.nn.Module],
+        address: Optional[Address] = None,
+        authkey: Optional[bytes] = None,
+        workers: int = SERVER_WORKERS,
+    ):
+        self.model_factory = model_factory
+        self.address = address or default_address()
+        self.authkey = authkey or server_key(create=True)
+        self.workers = max(1, workers)
+        self._models: Dict[Tuple[str, Optional[str]], torch.nn.Module] = {}
+        self._models_lock = threading.Lock()
+        self._queues: Dict[int, Deque[Tuple[Connection, dict]]] = {}
+        self._order: Deque[int] = deque()
+        self._send_locks: Dict[int, threading.Lock] = {}
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._listener: Optional[Listener] = None
+
+    def serve_forever(self) -> None:
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.unlink(self.address)
+        self._listener = Listener(self.address, authkey=self.authkey)
+        if isinstance(self.address, str):
+            os.chmod(self.address, 0o600)
+
+        for index in range(self.workers):
+            threading.Thread(
+                target=self._work, name=f"separation-server-{index}", daemon=True
+            ).start()
+
+        client_ids = itertools.count(1)
+        while not self._stopping:
+            try:
+                conn = self._listener.accept()
+            except (OSError, EOFError, AuthenticationError):
+                # Closed by shutdown(), or a client failed authentication
+                continue
+            threading.Thread(
+                target=self._serve_client, args=(next(client_ids), conn), daemon=True
+            ).start()
+
+    def shutdown(self) -> None:
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._listener is not None:
+            self._listener.close()
+
+    def _serve_client(self, client_id: int, conn: Connection) -> None:
+        with self._cond:
+            self._queues[client_id] = deque()
+            self._send_locks[client_id] = threading.Lock()
+            self._order.append(client_id)
+        try:
+            while True:
+                request = conn.recv()
+                with self._cond:
+                    self._queues[client_id].append((conn, request))
+                    self._cond.notify()
+        except (EOFError, OSError):
+            pass
+        finally:
+            with self._cond:
+                self._queues.pop(client_id, None)
+                self._send_locks.pop(client_id, None)
+                self._order.remove(client_id)
+            conn.close()
+
+    def _next_request(self) -> Optional[Tuple[int, Connection, dict]]:
+        with self._cond:
+            while not self._stopping:
+                for _ in range(len(self._order)):
+                    client_id = self._order[0]
+                    self._order.rotate(-1)
+                    if self._queues[client_id]:
+                        conn, request = self._queues[client_id].popleft()
+                        return client_id, conn, request
+                self._cond.wait()
+        return None
+
+    def _work(self) -> None:
+        while True:
+            item = self._next_request()
+            if item is None:
+                return
+            client_id, conn, request = item
+            try:
+                reply = {"id": request["id"], **self._handle(request)}
+            except Exception as e:
+                reply = {"id": request["id"], "error": str(e)}
+            lock = self._send_locks.get(client_id)
+            try:
+                if lock is None:
+                    raise OSError("client disconnected")
+                with lock:
+                    conn.send(reply)
+            except OSError:
+                # Client went away; release any block created for it
+                if "output" in reply:
+                    SharedMemory(name=reply["output"][0]).unlink()
+
+    def _model(self, name: str, checkpoint: Optional[str]) -> torch.nn.Module:
+        key = (name, checkpoint)
+        with self._models_lock:
+            if key not in self._models:
+                model = self.model_factory(name)
+                if checkpoint is not None:
+                    if not is_mmap_checkpoint(checkpoint):
+                        raise ValueError(f"Unsupported checkpoint: {checkpoint}")
+                    load_into(model, checkpoint)
+                model.eval()
+                self._models[key] = model
+            return self._models[key]
+
+    def _handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        op = request["op"]
+        model = self._model(request["model"], request.get("checkpoint"))
+        if op == "load":
+            return {}
+        if op != "run":
+            raise ValueError(f"Unknown request: {op}")
+
+        shm, array = _attach(request["input"])
+        try:
+            with torch.no_grad():
+                output = model(torch.from_numpy(array))
+            output = output.detach().cpu().numpy()
+        finally:
+            del array
+            shm.close()
+        out_shm, handle = _share(output)
+        # Ownership passes to the client, which unlinks the block
+        resource_tracker.unregister(out_shm._name, "shared_memory")
+        out_shm.close()
+        return {"output": handle}
+
+
+class SeparationClient:
+    """Connection to a SeparationServer; safe to share between threads."""
+
+    def __init__(
+        self, address: Optional[Address] = None, authkey: Optional[bytes] = None
+    ):
+        self._conn = Client(address or default_address(), authkey=authkey or server_key())
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def _request(self, **request: Any) -> Dict[str, Any]:
+        with self._lock:
+            request["id"] = next(self._ids)
+            self._conn.send(request)
+            reply = self._conn.recv()
+        if "error" in reply:
+            raise RuntimeError(f"Separation server: {reply['error']}")
+        return reply
+
+    def load_model(self, name: str, checkpoint: Optional[str] = None) -> None:
+        """Have the server build `name` (optionally from a checkpoint)."""
+        self._request(op="load", model=name, checkpoint=checkpoint)
+
+    def run_model(
+        self, name: str, array: np.ndarray, checkpoint: Optional[str] = None
+    ) -> np.ndarray:
+        shm, handle = _share(array)
+        try:
+            reply = self._request(
+                op="run", model=name, checkpoint=checkpoint, input=handle
+            )
+        finally:
+            shm.close()
+            shm.unlink()
+
+        out_shm, output = _attach(reply["output"], owner=True)
+        try:
+            return output.copy()
+        finally:
+            del output
+            out_shm.close()
+            out_shm.unlink()
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class RemoteModel:
+    """
+    Stands in for a torch module whose forward pass runs on the server, so
+    code written against local models (separate_segment, JobScheduler)
+    works unchanged.
+    """
+
+    def __init__(
+        self, client: SeparationClient, name: str, checkpoint: Optional[str] = None
+    ):
+        self.client = client
+        self.name = name
+        self.checkpoint = checkpoint
+
+    def eval(self) -> "RemoteModel":
+        return self
+
+    def __call__(self, x) -> torch.Tensor:
+        if isinstance(x, torch.Tensor):
+            x = x.detach().cpu().numpy()
+        output = self.client.run_model(self.name, np.asarray(x), self.checkpoint)
+        return torch.from_numpy(output)
+
+
+def main(argv=None) -> int:
+    from modules.model_manager import ModelManager
+
+    parser = argparse.ArgumentParser(description="Local separation server")
+    parser.add_argument(
+        "--address", help="Unix socket path, or host:port for TCP on localhost"
+    )
+    parser.add_argument("--workers", type=int, default=SERVER_WORKERS)
+    args = parser.parse_args(argv)
+
+    address = args.address
+    if address and ":" in address and not address.startswith("/"):
+        host, port = address.rsplit(":", 1)
+        address = (host, int(port))
+
+    server = SeparationServer(
+        ModelManager().create_model, address=address, workers=args.workers
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,32 @@
+import os
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
 import torch
 from PyQt6.QtCore import QObject, QThread, pyqtSignal, pyqtSlot
 
+from models.model_loader import (
+    is_mmap_checkpoint,
+    load_into,
+    read_metadata,
+    save_checkpoint,
+)
+from models.onnx_backend import benchmark, export_onnx, load_session
+from modules.audio.store import SampleStore
+from modules.interval_cache import IntervalCache
+
+TORCH_BACKEND = "torch"
+ONNX_BACKEND = "onnxruntime"
+
+# Audio fed to the model on each side of a selection and cropped afterwards
+MODEL_CONTEXT_SECONDS = 1.0
+# Longest piece of audio run through the model in one forward pass
+CHUNK_SECONDS = 30.0
+# Budget of the segment caches of all tracks together
+SEGMENT_CACHE_MB = 512
+
 
 # Dummy model classes for demonstration.
 class ModelA(torch.nn.Module):
@@ -12,6 +38,24 @@ class ModelA(torch.nn.Module):
         return self.fc(x)
 
 
+def separate_segment(model, store: SampleStore, start, stop, context_seconds):
+    """
+    Run `model` on frames [start, stop) of `store` padded with context on
+    both sides, and crop the output back to the requested frames.
+    """
+    context = int(context_seconds * store.sample_rate)
+    padded_start = max(start - context, 0)
+    padded_stop = min(stop + context, store.frames)
+
+    chunk = store.read(padded_start, padded_stop).T
+    with torch.no_grad():
+        output = model(torch.from_numpy(np.ascontiguousarray(chunk))[None])
+    output = output[0].cpu().numpy()
+
+    offset = start - padded_start
+    return output[..., offset : offset + (stop - start)]
+
+
 # Worker object that executes a function in a separate thread.
 class Worker(QObject):
     finished = pyqtSignal(object)
@@ -37,10 +81,12 @@ class ModelManager(QObject):
     # Signals for notifying the application about operation results
     model_loaded = pyqtSignal(object)
     model_run_finished = pyqtSignal(object)
+    range_separated = pyqtSignal(str, float, float, object)
     error_occurred = pyqtSignal(str)
 
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, settings=None):
         super().__init__(parent)
+        self.settings = settings
         # Dictionary mapping model names to model classes
         self.available_models = {
             "ModelA": ModelA,
@@ -48,6 +94,21 @@ class ModelManager(QObject):
             "ModelC": ModelA,
         }
         self.model = None
+        # Name `model` was built or loaded as; None when unknown
+        self.model_name = None
+        # Model -> checkpoint file its weights were loaded from
+        self._checkpoints = weakref.WeakKeyDictionary()
+        self.context_seconds = MODEL_CONTEXT_SECONDS
+        # Per-track caches of separated segments, keyed by track id, least
+        # recently used first
+        self.segment_caches = OrderedDict()
+        self._caches_lock = threading.Lock()
+        self._threads = {}
+        # Set by connect_server(); models then run in the separation server
+        self.client = None
+        # Model name -> exported ONNX file, for models using ONNX_BACKEND
+        self.onnx_paths = {}
+        self.backends = {}
 
     def get_available_models(self):
         """Return a list of available model names."""
@@ -59,42 +120,188 @@ class ModelManager(QObject):
         worker = Worker(func, *args, **kwargs)
         worker.moveToThread(thread)
 
+        # Keep both alive until the thread is done
+        self._threads[thread] = worker
+
         # Connect signals
         thread.started.connect(worker.run)
         worker.finished.connect(thread.quit)
         worker.finished.connect(worker.deleteLater)
         worker.error.connect(self.error_occurred)
         worker.error.connect(thread.quit)
+        thread.finished.connect(lambda: self._threads.pop(thread, None))
         thread.finished.connect(thread.deleteLater)
 
         thread.start()
         return worker
 
+    def connect_server(self, address=None):
+        """
+        Run models in a local separation server (modules.job_server) instead
+        of this process. Models created afterwards are RemoteModels that
+        send each forward pass to the server, where they stay warm.
+        """
+        # Imported here: job_server depends on this module through job_scheduler
+        from modules.job_server import SeparationClient
+
+        self.disconnect_server()
+        self.client = SeparationClient(address)
+        self.model = None
+        self.model_name = None
+        self.clear_segment_cache()
+
+    def disconnect_server(self):
+        if self.client is not None:
+            self.client.close()
+            self.client = None
+            self.model = None
+            self.model_name = None
+            self.clear_segment_cache()
+
+    def create_model(self, model_name, checkpoint=None):
+        """Instantiate a model by name in the calling thread."""
+        if model_name not in self.available_models:
+            raise ValueError(f"Model '{model_name}' is not available.")
+        if self.client is not None:
+            from modules.job_server import RemoteModel
+
+            self.client.load_model(model_name, checkpoint)
+            return RemoteModel(self.client, model_name, checkpoint)
+        if self.get_backend(model_name) == ONNX_BACKEND:
+            return load_session(self.onnx_paths[model_name], torch.get_num_threads())
+        model_class = self.available_models[model_name]
+        return model_class()
+
+    def loaded_model(self, model_name):
+        """The current model if it was built or loaded as `model_name`."""
+        if self.model is not None and self.model_name == model_name:
+            return self.model
+        return None
+
+    def model_identity(self, model_name):
+        """
+        Describe everything that shapes the output of `model_name` as a
+        string: name, backend and the version of the file the weights come
+        from (the ONNX export, or the checkpoint of the loaded model).
+        """
+        backend = self.get_backend(model_name)
+        if backend == ONNX_BACKEND:
+            weights = self.onnx_paths.get(model_name)
+        else:
+            loaded = self.loaded_model(model_name)
+            weights = None if loaded is None else self._checkpoints.get(loaded)
+        identity = f"{model_name}:{backend}"
+        if weights is not None:
+            identity += f":{os.path.abspath(weights)}"
+            try:
+                stat = os.stat(weights)
+                identity += f":{stat.st_mtime_ns}:{stat.st_size}"
+            except OSError:
+                pass
+        return identity
+
+    def use_model(self, model_name, model):
+        """Make `model` the current model, e.g. one warmed up elsewhere."""
+        if self.model is not model:
+            self.model = model
+            self.model_name = model_name
+            self.clear_segment_cache()
+
+    def get_backend(self, model_name):
+        return self.backends.get(model_name, TORCH_BACKEND)
+
+    def set_backend(self, model_name, backend):
+        """
+        Choose the engine `model_name` runs on. ONNX_BACKEND needs a file
+        from export_onnx(); models created afterwards use the new engine.
+        """
+        if backend not in (TORCH_BACKEND, ONNX_BACKEND):
+            raise ValueError(f"Unknown backend '{backend}'.")
+        if backend == ONNX_BACKEND and model_name not in self.onnx_paths:
+            raise RuntimeError(f"Model '{model_name}' has not been exported to ONNX.")
+        self.backends[model_name] = backend
+
+    def export_onnx(self, model_name, path, example_input, model=None):
+        """
+        Export `model` (the loaded `model_name` model by default) to ONNX and
+        register the file for ONNX_BACKEND. Raises ValueError if ONNX
+        Runtime does not reproduce the torch output on `example_input`.
+        """
+        model = self._torch_model(model_name, model)
+        self.onnx_paths[model_name] = export_onnx(model, path, example_input)
+        return path
+
+    def benchmark_backends(self, model_name, example_input, runs=10, model=None):
+        """Median seconds per forward pass on each backend of `model_name`."""
+        if model_name not in self.onnx_paths:
+            raise RuntimeError(f"Model '{model_name}' has not been exported to ONNX.")
+        model = self._torch_model(model_name, model)
+        model.eval()
+        session = load_session(self.onnx_paths[model_name], torch.get_num_threads())
+        return benchmark(model, session, example_input, runs)
+
+    def _torch_model(self, model_name, model=None):
+        # Exporting or timing freshly initialised weights would say nothing
+        # about the model the user actually runs
+        if model is None:
+            model = self.loaded_model(model_name)
+        if model is None:
+            raise RuntimeError(f"Model '{model_name}' is not loaded.")
+        if not isinstance(model, torch.nn.Module):
+            raise RuntimeError(f"Model '{model_name}' is not a local torch model.")
+        return model
+
     def build_model(self, model_name):
         """Build a model by name."""
 
         def _build():
-            if model_name not in self.available_models:
-                raise ValueError(f"Model '{model_name}' is not available.")
-            model_class = self.available_models[model_name]
-            model = model_class()
+            model = self.create_model(model_name)
             self.model = model
+            self.model_name = model_name
+            self.clear_segment_cache()
             return model
 
         worker = self._run_in_thread(_build)
         worker.finished.connect(self.model_loaded)
 
-    def load_checkpoint(self, model_path):
-        """Load a model from a checkpoint file."""
+    def load_checkpoint(self, model_path, model_name=None):
+        """
+        Load a model from a checkpoint file.
+
+        Memory-mapped checkpoints (see models.model_loader) are attached to a
+        freshly built `model_name` model, or the name stored in the file,
+        without copying the weights; anything else goes through
+        torch.jit.load.
+        """
 
         def _load():
-            model = torch.jit.load(model_path)
+            name = model_name
+            if is_mmap_checkpoint(model_path) and self.client is not None:
+                name = model_name or read_metadata(model_path).get("model_name")
+                model = self.create_model(name, model_path)
+            elif is_mmap_checkpoint(model_path):
+                name = model_name or read_metadata(model_path).get("model_name")
+                model = load_into(self.create_model(name), model_path)
+                model.eval()
+            else:
+                model = torch.jit.load(model_path)
+            self._checkpoints[model] = model_path
             self.model = model
+            self.model_name = name
+            self.clear_segment_cache()
             return model
 
         worker = self._run_in_thread(_load)
         worker.finished.connect(self.model_loaded)
 
+    def save_checkpoint(self, model_path, model_name):
+        """Write the current model's weights as a memory-mappable checkpoint."""
+        if self.model is None:
+            raise RuntimeError("No model loaded.")
+        save_checkpoint(
+            self.model.state_dict(), model_path, {"model_name": model_name}
+        )
+
     def run_model(self, input_data):
         """Run the model with the given input data."""
 
@@ -105,3 +312,74 @@ class ModelManager(QObject):
 
         worker = self._run_in_thread(_run)
         worker.finished.connect(self.model_run_finished)
+
+    def separate_range(self, track_id, store: SampleStore, start, end):
+        """
+        Separate only the selection [start, end) seconds of a track.
+
+        Each missing piece is run through the model in chunks of at most
+        `chunk_seconds`, with context padding on both sides that is cropped
+        back; results go into the track's segment cache, so overlapping or
+        adjacent selections reuse earlier work. The caches of all tracks are
+        kept within `segment_cache_mb`, dropping the least recently used
+        tracks first. Emits range_separated(track_id, start, end, stems)
+        with the spliced float32 result, time on the last axis.
+        """
+        chunk_seconds = CHUNK_SECONDS
+        cache_bytes = SEGMENT_CACHE_MB << 20
+        if self.settings is not None:
+            chunk_seconds = self.settings.get_performance("chunk_seconds")
+            cache_bytes = self.settings.get_performance("segment_cache_mb") << 20
+
+        def _separate():
+            if self.model is None:
+                raise RuntimeError("No model loaded.")
+            rate = store.sample_rate
+            first = min(max(int(start * rate), 0), store.frames)
+            stop = min(max(int(end * rate), 0), store.frames)
+            if stop <= first:
+                raise ValueError("Empty selection.")
+
+            cache = self._segment_cache(track_id)
+            chunk = max(1, int(chunk_seconds * rate))
+            for gap_start, gap_stop in cache.missing(first, stop):
+                for piece_start in range(gap_start, gap_stop, chunk):
+                    piece_stop = min(piece_start + chunk, gap_stop)
+                    stems = separate_segment(
+                        self.model, store, piece_start, piece_stop, self.context_seconds
+                    )
+                    cache.insert(piece_start, stems)
+            stems = cache.splice(first, stop)
+            self._trim_segment_caches(track_id, first, stop, cache_bytes)
+            return track_id, first / rate, stop / rate, stems
+
+        worker = self._run_in_thread(_separate)
+        worker.finished.connect(lambda result: self.range_separated.emit(*result))
+
+    def _segment_cache(self, track_id):
+        with self._caches_lock:
+            if track_id not in self.segment_caches:
+                self.segment_caches[track_id] = IntervalCache()
+            self.segment_caches.move_to_end(track_id)
+            return self.segment_caches[track_id]
+
+    def _trim_segment_caches(self, track_id, first, stop, max_bytes):
+        with self._caches_lock:
+            total = sum(cache.nbytes for cache in self.segment_caches.values())
+            for other in list(self.segment_caches):
+                if total <= max_bytes:
+                    return
+                if other != track_id:
+                    total -= self.segment_caches.pop(other).nbytes
+            cache = self.segment_caches.get(track_id)
+            if cache is not None and total > max_bytes:
+                # Only this track is left; keep what the selection needs
+                cache.discard_outside(first, stop)
+
+    def clear_segment_cache(self, track_id=None):
+        """Drop cached separations for one track, or for all of them."""
+        with self._caches_lock:
+            if track_id is None:
+                self.segment_caches.clear()
+            else:
+                self.segment_caches.pop(track_id, None)
@@ -0,0 +1,360 @@
+# modules/prefetcher.py
+import os
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import torch
+from PyQt6.QtCore import QObject, QThread, pyqtSignal, pyqtSlot
+
+from modules.audio.converter import ConvertingSource
+from modules.audio.loader import AudioSource, MemorySource, decode, open_source
+from modules.audio.store import SampleStore
+from modules.audio.summary import SummaryIndex
+from modules.audio.visualization import PeakOverview, TrackDecoder
+from modules.audio_processor import MODEL_CHANNELS, TARGET_SAMPLE_RATE
+from modules.canvas_manager import DECODE_BLOCK_SIZE
+from modules.model_manager import separate_segment
+
+# Niceness added to prefetch threads so they only use otherwise idle CPU
+PREFETCH_NICENESS = 10
+WARMUP_SECONDS = 1.0
+
+
+@dataclass
+class PrefetchedTrack:
+    """Everything needed to display and separate a track."""
+
+    path: str
+    store: SampleStore
+    peaks: PeakOverview
+    summary: SummaryIndex
+    # `store` converted to the model's sample rate and channel layout
+    model_input: SampleStore
+
+
+class PartialDecode:
+    """
+    A prefetch decode in progress: the open source, the decoder filling the
+    store and where it stopped. It is handed to a normal-priority worker
+    when the user asks for a track still decoding at low priority.
+    """
+
+    def __init__(self, source: AudioSource, block_size: int):
+        self.source = source
+        self.decoder = TrackDecoder(source)
+        self.blocks = self.decoder.blocks(block_size)
+        self.summary: Optional[SummaryIndex] = None
+
+    def close(self) -> None:
+        self.source.close()
+
+
+def _lower_thread_priority() -> None:
+    # QThread priorities are ignored by Linux' default scheduler, but
+    # threads can be reniced individually there
+    try:
+        os.setpriority(
+            os.PRIO_PROCESS,
+            threading.get_native_id(),
+            os.getpriority(os.PRIO_PROCESS, 0) + PREFETCH_NICENESS,
+        )
+    except (AttributeError, OSError):
+        pass
+
+
+class PrefetchWorker(QObject):
+    """Decodes a track and warms up a model, checking for cancellation."""
+
+    track_ready = pyqtSignal(int, object)
+    model_ready = pyqtSignal(int, str, object)
+    # Emitted instead of track_ready when promoted while decoding
+    handed_off = pyqtSignal(int, object)
+    finished = pyqtSignal(int)
+    error = pyqtSignal(int, str)
+
+    def __init__(
+        self,
+        token: int,
+        file_path: str,
+        model_name: Optional[str],
+        model_manager,
+        track: Optional[PrefetchedTrack] = None,
+        model=None,
+        block_size: int = DECODE_BLOCK_SIZE,
+        low_priority: bool = True,
+        partial: Optional[PartialDecode] = None,
+    ):
+        super().__init__()
+        self.token = token
+        self.file_path = file_path
+        self.model_name = model_name
+        self.model_manager = model_manager
+        self.track = track
+        self.model = model
+        self.block_size = block_size
+        self.low_priority = low_priority
+        self.partial = partial
+        self._cancelled = threading.Event()
+        self._promoted = threading.Event()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def promote(self) -> None:
+        """Hand the decode over at its next step; see Prefetcher.request."""
+        self._promoted.set()
+
+    def is_cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    @pyqtSlot()
+    def run(self):
+        try:
+            if self.low_priority:
+                _lower_thread_priority()
+            if self.track is None:
+                self.track = self._decode()
+                if self.track is None:
+                    return
+                self.track_ready.emit(self.token, self.track)
+            if self.model_name and not self._cancelled.is_set():
+                self._warm_up()
+        except Exception as e:
+            self.error.emit(self.token, str(e))
+        finally:
+            self.finished.emit(self.token)
+
+    def _decode(self) -> Optional[PrefetchedTrack]:
+        partial = self.partial
+        if partial is None:
+            partial = PartialDecode(open_source(self.file_path), self.block_size)
+        keep_open = False
+        try:
+            for _ in partial.blocks:
+                if self._cancelled.is_set():
+                    return None
+                if self._promoted.is_set():
+                    keep_open = True
+                    self.handed_off.emit(self.token, partial)
+                    return None
+            store, peaks = partial.decoder.store, partial.decoder.peaks
+            if partial.summary is None:
+                partial.summary = SummaryIndex(store)
+            if self._cancelled.is_set():
+                return None
+            if self._promoted.is_set():
+                keep_open = True
+                self.handed_off.emit(self.token, partial)
+                return None
+        finally:
+            if not keep_open:
+                partial.close()
+
+        if store.sample_rate == TARGET_SAMPLE_RATE and store.channels == MODEL_CHANNELS:
+            model_input = store
+        else:
+            model_input = decode(
+                ConvertingSource(MemorySource(store), TARGET_SAMPLE_RATE, MODEL_CHANNELS)
+            )
+        return PrefetchedTrack(self.file_path, store, peaks, partial.summary, model_input)
+
+    def _warm_up(self) -> None:
+        if self.model is None:
+            # A model the user built or loaded from a checkpoint under this
+            # name is the one to run, not a freshly initialised one
+            self.model = self.model_manager.loaded_model(self.model_name)
+        if self.model is None:
+            self.model = self.model_manager.create_model(self.model_name)
+            self.model.eval()
+        # One short forward pass allocates buffers and picks kernels, so
+        # the first real chunk runs at full speed
+        store = self.track.model_input
+        stop = min(store.frames, int(WARMUP_SECONDS * store.sample_rate))
+        try:
+            with torch.no_grad():
+                separate_segment(self.model, store, 0, stop, 0.0)
+        except Exception:
+            # Models that do not take audio are still built and cached
+            pass
+        if not self._cancelled.is_set():
+            self.model_ready.emit(self.token, self.model_name, self.model)
+
+
+class Prefetcher(QObject):
+    """
+    Speculatively prepares the selected track and model before the user
+    asks for a separation.
+
+    prefetch() decodes the file, builds its peaks and summary, converts it
+    for the model and warms up the model on a low-priority thread. Picking
+    another file or model cancels the pending work. Changing only the model
+    keeps the decoded track, and warm models are kept for reuse. request()
+    returns the result through `ready` as (track, model name, model) as soon
+    as it is complete.
+    """
+
+    track_ready = pyqtSignal(object)
+    ready = pyqtSignal(object, str, object)
+    error_occurred = pyqtSignal(str)
+
+    def __init__(self, model_manager, settings=None, parent=None):
+        super().__init__(parent)
+        self.model_manager = model_manager
+        self.settings = settings
+        self.track: Optional[PrefetchedTrack] = None
+        self.models: Dict[str, object] = {}
+        self._path: Optional[str] = None
+        self._model_name: Optional[str] = None
+        self._token = 0
+        self._requested = False
+        self._workers: Dict[int, PrefetchWorker] = {}
+        self._threads: Dict[int, QThread] = {}
+        # Warm copies of a model are stale once the manager loads a new one
+        model_manager.model_loaded.connect(self._on_model_loaded)
+
+    def prefetch(
+        self, file_path: str, model_name: Optional[str] = None, low_priority=True
+    ) -> None:
+        if file_path == self._path and model_name == self._model_name:
+            if self._token in self._workers or self._is_complete():
+                return
+        self._start(file_path, model_name, low_priority)
+
+    def _start(
+        self,
+        file_path: str,
+        model_name: Optional[str],
+        low_priority: bool,
+        partial: Optional[PartialDecode] = None,
+    ):
+        self.cancel()
+        self._path = file_path
+        self._model_name = model_name
+        if self.track is not None and self.track.path != file_path:
+            self.track = None
+        if self._is_complete():
+            if partial is not None:
+                partial.close()
+            return
+
+        self._token += 1
+        block_size = DECODE_BLOCK_SIZE
+        if self.settings is not None:
+            block_size = self.settings.get_performance("decode_block_size")
+        worker = PrefetchWorker(
+            self._token,
+            file_path,
+            model_name,
+            self.model_manager,
+            track=self.track,
+            model=self.models.get(model_name),
+            block_size=block_size,
+            low_priority=low_priority,
+            partial=partial,
+        )
+        thread = QThread(self)
+        worker.moveToThread(thread)
+
+        thread.started.connect(worker.run)
+        worker.track_ready.connect(self._on_track_ready)
+        worker.model_ready.connect(self._on_model_ready)
+        worker.handed_off.connect(self._on_handed_off)
+        worker.error.connect(self._on_error)
+        worker.finished.connect(self._on_finished)
+        worker.finished.connect(thread.quit)
+        worker.finished.connect(worker.deleteLater)
+        thread.finished.connect(thread.deleteLater)
+
+        token = self._token
+        thread.finished.connect(lambda: self._threads.pop(token, None))
+        self._workers[token] = worker
+        self._threads[token] = thread
+        thread.start(
+            QThread.Priority.LowestPriority
+            if low_priority
+            else QThread.Priority.InheritPriority
+        )
+
+    def set_model(self, model_name: str) -> None:
+        """Switch the model to warm up, keeping the decoded track."""
+        if self._path is not None:
+            self.prefetch(self._path, model_name)
+
+    def request(self, file_path: str, model_name: str) -> None:
+        """Emit `ready` for this file and model once they are prepared."""
+        matches = file_path == self._path and model_name == self._model_name
+        worker = self._workers.get(self._token)
+        if matches and worker is not None and worker.low_priority:
+            # The user is waiting now, and an unprivileged thread cannot be
+            # reniced back: the worker hands its decode to a normal-priority
+            # worker at its next block, or finishes if it is already past it
+            worker.promote()
+        else:
+            self.prefetch(file_path, model_name, low_priority=False)
+        self._requested = True
+        if self._is_complete():
+            self._emit_ready()
+
+    def cancel(self) -> None:
+        # Workers stop at their next block; late signals carry a stale token
+        self._requested = False
+        worker = self._workers.get(self._token)
+        if worker is not None:
+            worker.cancel()
+
+    def shutdown(self) -> None:
+        """Cancel all prefetches and wait for their threads to exit."""
+        for worker in self._workers.values():
+            worker.cancel()
+        for thread in list(self._threads.values()):
+            thread.quit()
+            thread.wait()
+
+    def _is_complete(self) -> bool:
+        return self.track is not None and (
+            self._model_name is None or self._model_name in self.models
+        )
+
+    def _emit_ready(self) -> None:
+        self._requested = False
+        self.ready.emit(
+            self.track, self._model_name or "", self.models.get(self._model_name)
+        )
+
+    def _on_track_ready(self, token: int, track: PrefetchedTrack) -> None:
+        if token != self._token:
+            return
+        self.track = track
+        self.track_ready.emit(track)
+
+    def _on_handed_off(self, token: int, partial: PartialDecode) -> None:
+        if token != self._token:
+            partial.close()
+            return
+        requested = self._requested
+        self._start(self._path, self._model_name, low_priority=False, partial=partial)
+        self._requested = requested
+
+    def _on_model_ready(self, token: int, model_name: str, model) -> None:
+        loaded = self.model_manager.loaded_model(model_name)
+        if loaded is not None and loaded is not model:
+            # Built before the manager loaded its own `model_name`
+            return
+        # Warm models are kept even when the prefetch was superseded
+        self.models[model_name] = model
+
+    def _on_model_loaded(self, model) -> None:
+        self.models.pop(self.model_manager.model_name, None)
+
+    def _on_error(self, token: int, message: str) -> None:
+        if token == self._token:
+            self._requested = False
+            self.error_occurred.emit(message)
+
+    def _on_finished(self, token: int) -> None:
+        worker = self._workers.pop(token, None)
+        if token != self._token or worker is None or worker.is_cancelled():
+            return
+        if self._requested and self._is_complete():
+            self._emit_ready()
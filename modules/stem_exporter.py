@@ -0,0 +1,213 @@
+# modules/stem_exporter.py
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+import ffmpeg
+import numpy as np
+import soundfile as sf
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from modules.interval_cache import IntervalCache
+
+EXPORT_FORMATS = {"wav", "flac", "mp3"}
+EXPORT_BLOCK_SIZE = 65536
+EXPORT_WORKERS = 4
+MP3_BITRATE = "320k"
+
+
+class CachedStemSource:
+    """Exposes one stem of a cached separation range as a readable source."""
+
+    def __init__(
+        self,
+        cache: IntervalCache,
+        stem: int,
+        start: int,
+        stop: int,
+        sample_rate: int,
+        channels: int,
+    ):
+        self.cache = cache
+        self.stem = stem
+        self.start = start
+        self.frames = stop - start
+        self.sample_rate = sample_rate
+        self.channels = channels
+
+    def read(self, start: int, stop: int) -> np.ndarray:
+        block = self.cache.splice(self.start + start, self.start + stop, self.stem)
+        return np.ascontiguousarray(block.T)
+
+
+class _SoundFileWriter:
+    def __init__(self, path: str, fmt: str, sample_rate: int, channels: int):
+        subtype = "PCM_16" if fmt == "wav" else "PCM_24"
+        self._file = sf.SoundFile(
+            path, "w", sample_rate, channels, subtype=subtype, format=fmt.upper()
+        )
+
+    def write(self, block: np.ndarray) -> None:
+        self._file.write(block)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class _FFmpegWriter:
+    def __init__(self, path: str, sample_rate: int, channels: int):
+        self._process = (
+            ffmpeg.input("pipe:", format="f32le", ac=channels, ar=sample_rate)
+            .output(path, acodec="libmp3lame", audio_bitrate=MP3_BITRATE)
+            .overwrite_output()
+            .run_async(pipe_stdin=True, quiet=True)
+        )
+
+    def write(self, block: np.ndarray) -> None:
+        self._process.stdin.write(block.astype("<f4", copy=False).tobytes())
+
+    def close(self) -> None:
+        self._process.stdin.close()
+        if self._process.wait() != 0:
+            raise RuntimeError("ffmpeg failed to encode stem")
+
+
+class StemExporter(QObject):
+    """
+    Encodes all stems of a track concurrently in a worker pool.
+
+    Every stem is streamed block by block from its source (a SampleStore or
+    CachedStemSource) to soundfile or an ffmpeg pipe, so at most one block
+    per worker is held in memory. progress_updated carries a 0-100 value
+    suitable for ProgressWindow.update_progress.
+    """
+
+    progress_updated = pyqtSignal(int)
+    throughput_updated = pyqtSignal(float)
+    export_finished = pyqtSignal(object)
+    error_occurred = pyqtSignal(str)
+
+    def __init__(
+        self,
+        max_workers: int = EXPORT_WORKERS,
+        block_size: int = EXPORT_BLOCK_SIZE,
+        parent: Optional[QObject] = None,
+    ):
+        super().__init__(parent)
+        self.block_size = block_size
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="stem-export"
+        )
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+
+    def export(
+        self,
+        stems: Dict[str, object],
+        output_dir: str,
+        base_name: str,
+        fmt: str = "wav",
+    ) -> None:
+        """Start writing `stems` to `output_dir` without blocking the caller."""
+        fmt = fmt.lower()
+        if fmt not in EXPORT_FORMATS:
+            self.error_occurred.emit(f"Unsupported export format: {fmt}")
+            return
+        os.makedirs(output_dir, exist_ok=True)
+
+        self._cancelled.clear()
+        self._total = sum(source.frames for source in stems.values()) or 1
+        self._written = 0
+        self._written_bytes = 0
+        self._last_percent = -1
+        self._started = time.perf_counter()
+        self._pending = len(stems)
+        self._paths = {}
+        self._failed = False
+
+        for name, source in stems.items():
+            path = os.path.join(output_dir, f"{base_name}_{name}.{fmt}")
+            future = self._pool.submit(self._write_stem, source, path, fmt)
+            future.add_done_callback(
+                lambda done, name=name, path=path: self._on_stem_done(
+                    done, name, path
+                )
+            )
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def shutdown(self) -> None:
+        self._cancelled.set()
+        self._pool.shutdown(wait=True)
+
+    def _write_stem(self, source, path: str, fmt: str) -> None:
+        try:
+            self._encode(source, path, fmt)
+        except Exception:
+            _remove(path)
+            raise
+        if self._cancelled.is_set():
+            _remove(path)
+
+    def _encode(self, source, path: str, fmt: str) -> None:
+        if fmt == "mp3":
+            writer = _FFmpegWriter(path, source.sample_rate, source.channels)
+        else:
+            writer = _SoundFileWriter(path, fmt, source.sample_rate, source.channels)
+
+        try:
+            for start in range(0, source.frames, self.block_size):
+                if self._cancelled.is_set():
+                    break
+                stop = min(start + self.block_size, source.frames)
+                writer.write(source.read(start, stop))
+                self._advance(stop - start, source.channels)
+        finally:
+            writer.close()
+
+    def _advance(self, frames: int, channels: int) -> None:
+        with self._lock:
+            self._written += frames
+            self._written_bytes += frames * channels * 4
+            percent = int(100 * self._written / self._total)
+            if percent == self._last_percent:
+                return
+            self._last_percent = percent
+            elapsed = max(time.perf_counter() - self._started, 1e-6)
+            # Throughput in MB/s of float32 PCM handed to the encoders
+            throughput = self._written_bytes / elapsed / 1e6
+
+        self.progress_updated.emit(percent)
+        self.throughput_updated.emit(throughput)
+
+    def _on_stem_done(self, future, name: str, path: str) -> None:
+        error = future.exception()
+        with self._lock:
+            self._pending -= 1
+            if error is None:
+                self._paths[name] = path
+            report = error is not None and not self._failed
+            self._failed = self._failed or error is not None
+            finished = self._pending == 0
+
+        if report:
+            self._cancelled.set()
+            self.error_occurred.emit(f"Export of '{name}' failed: {error}")
+        if not finished:
+            return
+        if self._failed or self._cancelled.is_set():
+            # An export that did not complete leaves no stems behind
+            for stem_path in self._paths.values():
+                _remove(stem_path)
+        else:
+            self.export_finished.emit(dict(self._paths))
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,51 @@
+import unittest
+
+import numpy as np
+
+from modules.audio.converter import ConvertingSource
+from modules.audio.loader import MemorySource
+from modules.audio.store import SampleStore
+
+
+class ConvertingSourceTest(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        data = rng.uniform(-0.5, 0.5, (20000, 2)).astype(np.float32)
+        self.source = MemorySource(SampleStore.from_float(data, 44100))
+
+    def assert_streamed_matches_read(self, sample_rate, channels, block_size):
+        converter = ConvertingSource(self.source, sample_rate, channels)
+        positions = []
+        blocks = []
+        for position, block in converter.iter_blocks(block_size):
+            positions.append(position)
+            blocks.append(block)
+        streamed = np.concatenate(blocks)
+
+        # Blocks follow each other without gaps or overlaps
+        expected = np.cumsum([0] + [len(block) for block in blocks[:-1]])
+        self.assertEqual(positions, list(expected))
+        self.assertEqual(len(streamed), converter.frames)
+        np.testing.assert_allclose(
+            streamed, converter.read(0, converter.frames), atol=1e-5
+        )
+
+    def test_upsampling_carries_state_across_blocks(self):
+        self.assert_streamed_matches_read(48000, 2, 1000)
+
+    def test_downsampling_carries_state_across_blocks(self):
+        self.assert_streamed_matches_read(22050, 2, 777)
+
+    def test_blocks_shorter_than_filter(self):
+        self.assert_streamed_matches_read(48000, 1, 7)
+
+    def test_read_from_the_middle(self):
+        converter = ConvertingSource(self.source, 48000, 2)
+        streamed = np.concatenate([b for _, b in converter.iter_blocks(1000)])
+        np.testing.assert_allclose(
+            converter.read(5000, 3000), streamed[5000:8000], atol=1e-5
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+
+import numpy as np
+
+from modules.interval_cache import IntervalCache
+
+
+def ramp(start, stop, rows=2):
+    """Stems whose value is their frame index, so splices are easy to check."""
+    return np.tile(np.arange(start, stop, dtype=np.float32), (rows, 1))
+
+
+class IntervalCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.cache = IntervalCache(dtype=np.float32)
+        self.cache.insert(100, ramp(100, 200))
+        self.cache.insert(300, ramp(300, 400))
+
+    def test_missing_reports_gaps(self):
+        self.assertEqual(
+            self.cache.missing(0, 500), [(0, 100), (200, 300), (400, 500)]
+        )
+        self.assertEqual(self.cache.missing(120, 180), [])
+        self.assertEqual(self.cache.missing(150, 350), [(200, 300)])
+
+    def test_overlapping_insert_keeps_cached_frames(self):
+        # Different values over the cached parts must not replace them
+        self.cache.insert(50, np.full((2, 400), -1.0, dtype=np.float32))
+        self.assertEqual(self.cache.missing(0, 500), [(0, 50), (450, 500)])
+        spliced = self.cache.splice(50, 450)
+        np.testing.assert_array_equal(spliced[:, 50:150], ramp(100, 200))
+        np.testing.assert_array_equal(spliced[:, 250:350], ramp(300, 400))
+        np.testing.assert_array_equal(spliced[:, :50], -1.0)
+        np.testing.assert_array_equal(spliced[:, 150:250], -1.0)
+
+    def test_splice_across_segments(self):
+        self.cache.insert(200, ramp(200, 300))
+        spliced = self.cache.splice(150, 350)
+        self.assertEqual(spliced.dtype, np.float32)
+        np.testing.assert_array_equal(spliced, ramp(150, 350))
+
+    def test_splice_one_row(self):
+        self.cache.insert(200, ramp(200, 300))
+        spliced = self.cache.splice(150, 350, row=1)
+        np.testing.assert_array_equal(spliced, np.arange(150, 350))
+
+    def test_splice_over_a_gap_raises(self):
+        with self.assertRaises(KeyError):
+            self.cache.splice(150, 350)
+        with self.assertRaises(KeyError):
+            self.cache.splice(350, 450)
+
+    def test_discard_outside(self):
+        self.cache.discard_outside(0, 150)
+        self.assertEqual(len(self.cache), 1)
+        self.assertEqual(self.cache.missing(0, 500), [(0, 100), (200, 500)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import numpy as np
+import soundfile as sf
+import torch
+
+from modules.audio_processor import MODEL_CHANNELS, TARGET_SAMPLE_RATE
+from modules.job_scheduler import DONE, RUNNING, JobScheduler
+from modules.model_manager import TORCH_BACKEND
+
+CHUNK_SECONDS = 1.0
+CHUNK_FRAMES = int(CHUNK_SECONDS * TARGET_SAMPLE_RATE)
+
+
+class CountingModel(torch.nn.Module):
+    """Halves its input as a single stem and records every input length."""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def forward(self, x):
+        self.calls.append(x.shape[-1])
+        return x[:, None] * 0.5
+
+
+class FakeModelManager:
+    def __init__(self, model):
+        self.model = model
+        self.client = None
+
+    def model_identity(self, model_name):
+        return f"{model_name}:{TORCH_BACKEND}:v1"
+
+    def get_backend(self, model_name):
+        return TORCH_BACKEND
+
+    def loaded_model(self, model_name):
+        return self.model
+
+
+class ResumeTest(unittest.TestCase):
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.data_dir, True)
+        rng = np.random.default_rng(0)
+        self.audio = rng.uniform(-0.5, 0.5, (3 * CHUNK_FRAMES + 1000, MODEL_CHANNELS))
+        self.input_path = os.path.join(self.data_dir, "track.wav")
+        sf.write(self.input_path, self.audio, TARGET_SAMPLE_RATE, subtype="FLOAT")
+
+        self.model = CountingModel()
+        self.scheduler = JobScheduler(
+            FakeModelManager(self.model), self.data_dir, chunk_seconds=CHUNK_SECONDS
+        )
+        self.addCleanup(self.scheduler.shutdown)
+
+    def add_interrupted_job(self, done, identity="ModelA:torch:v1"):
+        """Journal a job that crashed after checkpointing `done` chunks."""
+        output_dir = os.path.join(self.data_dir, "stems")
+        job_id = self.scheduler.store.add(self.input_path, "ModelA", output_dir, 0)
+        job_dir = os.path.join(self.scheduler.checkpoint_dir, str(job_id))
+        os.makedirs(job_dir)
+        for index in range(done):
+            # Marked so the output shows which chunks came from checkpoints
+            chunk = np.full((1, MODEL_CHANNELS, CHUNK_FRAMES), -1.0, np.float16)
+            np.save(self.scheduler._chunk_path(job_dir, index), chunk)
+        self.scheduler.store.update(
+            job_id,
+            status=RUNNING,
+            chunk_frames=CHUNK_FRAMES,
+            sample_rate=TARGET_SAMPLE_RATE,
+            model_identity=identity,
+            chunks_total=4,
+            chunks_done=done,
+        )
+        return job_id
+
+    def run_to_completion(self, job_id):
+        self.scheduler.resume()
+        deadline = time.monotonic() + 30
+        while self.scheduler.store.get(job_id)["status"] != DONE:
+            self.assertLess(time.monotonic(), deadline, "job did not finish")
+            time.sleep(0.01)
+        output_dir = self.scheduler.store.get(job_id)["output_dir"]
+        stem, _ = sf.read(os.path.join(output_dir, "track_stem0.wav"))
+        return stem
+
+    def test_resume_skips_checkpointed_chunks(self):
+        job_id = self.add_interrupted_job(2)
+        stem = self.run_to_completion(job_id)
+
+        # Only the last two chunks ran, and the first two come from checkpoints
+        self.assertEqual(len(self.model.calls), 2)
+        self.assertEqual(len(stem), len(self.audio))
+        np.testing.assert_allclose(stem[: 2 * CHUNK_FRAMES], -1.0, atol=1e-3)
+        np.testing.assert_allclose(
+            stem[2 * CHUNK_FRAMES :], self.audio[2 * CHUNK_FRAMES :] * 0.5, atol=1e-3
+        )
+
+    def test_checkpoints_of_other_weights_are_rerun(self):
+        job_id = self.add_interrupted_job(2, identity="ModelA:torch:v0")
+        stem = self.run_to_completion(job_id)
+
+        self.assertEqual(len(self.model.calls), 4)
+        np.testing.assert_allclose(stem, self.audio * 0.5, atol=1e-3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+
+import numpy as np
+
+from modules.audio.loader import AudioSource, decode
+from modules.audio.visualization import TrackDecoder
+
+
+class EstimatedSource(AudioSource):
+    """Announces `frames` but yields `actual` frames, like an ffmpeg pipe."""
+
+    def __init__(self, frames, actual, channels=2, sample_rate=44100):
+        self.frames = frames
+        self.channels = channels
+        self.sample_rate = sample_rate
+        rng = np.random.default_rng(0)
+        self.samples = rng.integers(-20000, 20000, (actual, channels), dtype=np.int16)
+
+    def read(self, start, frames, dtype="float32"):
+        return self.samples[start : start + frames]
+
+    def iter_blocks(self, block_size=65536, start=0, dtype="float32"):
+        for position in range(start, len(self.samples), block_size):
+            yield position, self.samples[position : position + block_size]
+
+
+class DecodeTest(unittest.TestCase):
+    def test_source_longer_than_announced(self):
+        source = EstimatedSource(100000, 140000)
+        store = decode(source, block_size=4096)
+        np.testing.assert_array_equal(store.samples, source.samples)
+
+    def test_source_shorter_than_announced(self):
+        source = EstimatedSource(140000, 100000)
+        store = decode(source, block_size=4096)
+        np.testing.assert_array_equal(store.samples, source.samples)
+
+
+class TrackDecoderTest(unittest.TestCase):
+    def test_source_longer_than_announced(self):
+        source = EstimatedSource(100000, 140000)
+        decoder = TrackDecoder(source)
+        ends = list(decoder.blocks(4096))
+        self.assertEqual(ends[-1], 100000)
+        np.testing.assert_array_equal(decoder.store.samples, source.samples[:100000])
+
+    def test_source_shorter_than_announced(self):
+        source = EstimatedSource(140000, 100000)
+        decoder = TrackDecoder(source)
+        ends = list(decoder.blocks(4096))
+        self.assertEqual(ends[-1], 100000)
+        np.testing.assert_array_equal(decoder.store.samples, source.samples)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+
+import numpy as np
+
+from modules.audio.store import SampleStore
+from modules.audio.summary import SummaryIndex
+
+
+class SummaryIndexTest(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        # Loud whole blocks followed by a quiet partial block
+        data = np.concatenate(
+            [
+                rng.uniform(-1.0, 1.0, (3 * 4096, 2)),
+                rng.uniform(-0.01, 0.01, (1000, 2)),
+            ]
+        ).astype(np.float32)
+        # A power-of-two rate keeps frame -> seconds -> frame exact
+        self.store = SampleStore.from_float(data, 8192)
+        self.index = SummaryIndex(self.store, block_size=4096)
+
+    def assert_matches_direct(self, first, stop):
+        rate = self.store.sample_rate
+        stats = self.index.stats(first / rate, stop / rate)
+        frames = self.store.read(first, stop)
+        self.assertAlmostEqual(stats.rms, float(np.sqrt(np.mean(frames**2))), places=5)
+        self.assertAlmostEqual(stats.peak, float(np.abs(frames).max()), places=5)
+        self.assertAlmostEqual(stats.dc_offset, float(frames.mean()), places=5)
+
+    def test_region_spanning_blocks(self):
+        self.assert_matches_direct(1000, 3 * 4096 + 500)
+
+    def test_region_inside_trailing_partial_block(self):
+        frames = self.store.frames
+        self.assert_matches_direct(frames - 500, frames)
+
+    def test_region_inside_one_block(self):
+        self.assert_matches_direct(100, 900)
+
+
+if __name__ == "__main__":
+    unittest.main()
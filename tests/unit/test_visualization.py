@@ -0,0 +1,36 @@
+import unittest
+
+import numpy as np
+
+from modules.audio.store import SampleStore
+from modules.audio.visualization import PeakOverview
+
+
+class AddLaneTest(unittest.TestCase):
+    def setUp(self):
+        self.rate = 8192
+        self.peaks = PeakOverview(10 * self.rate, 2, self.rate, samples_per_peak=512)
+        self.peaks.filled = 10 * self.rate
+
+    def stem(self, seconds, value):
+        data = np.full((seconds * self.rate, 2), value, dtype=np.float32)
+        return SampleStore.from_float(data, self.rate, np.float16)
+
+    def test_full_length_stem(self):
+        column = self.peaks.add_lane(self.stem(10, 0.5))
+        _, y = self.peaks.curve(column)
+        np.testing.assert_allclose(y, 0.5)
+
+    def test_stem_of_a_range_is_placed_at_its_start(self):
+        column = self.peaks.add_lane(self.stem(2, 0.5), start=3.0)
+        x, y = self.peaks.curve(column)
+        covered = np.isfinite(y)
+        np.testing.assert_allclose(y[covered], 0.5)
+        self.assertAlmostEqual(x[covered].min(), 3.0)
+        self.assertAlmostEqual(x[covered].max(), 5.0 - 512 / self.rate)
+        # Buckets outside the stem are gaps, not +-inf
+        self.assertFalse(np.isinf(y).any())
+
+
+if __name__ == "__main__":
+    unittest.main()